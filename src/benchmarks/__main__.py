@@ -0,0 +1,70 @@
+import argparse
+import os
+import sys
+import tempfile
+from .generator import ensure_dataset, preset_rows
+from .harness import (
+    run_benchmarks, save_baseline, load_baseline, compare_results, format_result, format_comparison,
+)
+from .suite import GROUPS, build_suite
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Бенчмарки CSVReader, DataQueryBuilder, статистик и экспортёров",
+        epilog="Базовые линии хранятся в src/benchmarks/baselines/<size>_<seed>.json. "
+               "Обновить: python -m src.benchmarks --size 10k --save-baseline; "
+               "сравнить: python -m src.benchmarks --size 10k --compare.",
+    )
+    parser.add_argument('--size', default='10k', help="10k, 1m, 10m или число строк")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--only', default=None, help="запускать только бенчмарки с этим префиксом")
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'mipt_benchmarks'))
+    parser.add_argument('--no-memory', action='store_true', help="не измерять пиковую память")
+    parser.add_argument('--baseline', default=None, help="путь к файлу базовой линии")
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    rows = preset_rows(args.size)
+    label = f"{args.size}_{args.seed}"
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{label}.json")
+
+    path = ensure_dataset(args.data_dir, rows, args.seed)
+    print(f"Набор данных: {path} ({rows} строк)")
+
+    benchmarks = build_suite(path, args.data_dir, args.groups)
+    if args.only:
+        benchmarks = [benchmark for benchmark in benchmarks if benchmark.name.startswith(args.only)]
+
+    results = run_benchmarks(benchmarks, args.repeat, not args.no_memory, lambda result: print(format_result(result)))
+
+    status = 0
+    if args.compare:
+        baseline = load_baseline(baseline_path)
+        if baseline is None:
+            print(f"Базовая линия не найдена: {baseline_path}")
+        else:
+            print(f"\nСравнение с базовой линией {baseline_path}:")
+            for comparison in compare_results(results, baseline, args.tolerance):
+                print(format_comparison(comparison))
+                if comparison['status'] == 'regression':
+                    status = 1
+
+    if args.save_baseline:
+        save_baseline(results, baseline_path, label)
+        print(f"Базовая линия сохранена: {baseline_path}")
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
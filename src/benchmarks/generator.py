@@ -0,0 +1,102 @@
+import csv
+import os
+import random
+from typing import List, Dict
+
+HEADERS: List[str] = [
+    'Name', 'Description', 'URL', 'Created At', 'Updated At', 'Homepage', 'Size', 'Stars', 'Forks',
+    'Issues', 'Watchers', 'Language', 'License', 'Topics', 'Has Issues', 'Has Projects', 'Has Downloads',
+    'Has Wiki', 'Has Pages', 'Has Discussions', 'Is Fork', 'Is Archived', 'Is Template', 'Default Branch',
+]
+
+PRESETS: Dict[str, int] = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+LANGUAGES = [
+    'Python', 'JavaScript', 'TypeScript', 'Java', 'Go', 'C++', 'C', 'Rust', 'Ruby', 'PHP',
+    'C#', 'Kotlin', 'Swift', 'Shell', 'Jupyter Notebook', 'HTML', '',
+]
+LICENSES = ['MIT License', 'Apache License 2.0', 'GNU General Public License v3.0', 'BSD 3-Clause', 'Other', '']
+TOPICS = ['machine-learning', 'web', 'cli', 'database', 'devops', 'security', 'api', 'react', 'rust', 'python']
+WORDS = ['fast', 'simple', 'modern', 'tool', 'library', 'framework', 'for', 'the', 'data', 'web', 'cli', 'api']
+
+
+def preset_rows(size: str) -> int:
+    if size.lower() in PRESETS:
+        return PRESETS[size.lower()]
+    try:
+        return int(size)
+    except ValueError:
+        raise ValueError(f"Неизвестный размер набора данных: {size}. Доступные: {list(PRESETS)} или число строк")
+
+
+def _description(rng: random.Random) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 12)))
+    kind = rng.random()
+    if kind < 0.05:
+        return ''
+    if kind < 0.10:
+        return f'{text}, "{rng.choice(WORDS)}"'
+    if kind < 0.12:
+        return f'{text}\n{rng.choice(WORDS)}'
+    return text
+
+
+def _date(rng: random.Random) -> str:
+    return f"{rng.randint(2008, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00Z"
+
+
+def _flag(rng: random.Random, probability: float) -> str:
+    return 'True' if rng.random() < probability else 'False'
+
+
+def generate_row(rng: random.Random, index: int) -> List[str]:
+    owner = f"owner{rng.randint(0, max(index // 8, 1))}"
+    stars = int(rng.paretovariate(1.2)) - 1
+    return [
+        f"{owner}/repo{index}",
+        _description(rng),
+        f"https://github.com/{owner}/repo{index}",
+        _date(rng),
+        _date(rng),
+        f"https://{owner}.github.io" if rng.random() < 0.2 else '',
+        str(rng.randint(0, 5_000_000)),
+        str(stars),
+        str(stars // rng.randint(2, 20)),
+        str(rng.randint(0, 2_000)),
+        str(stars),
+        rng.choice(LANGUAGES),
+        rng.choice(LICENSES),
+        '|'.join(rng.sample(TOPICS, rng.randint(0, 3))),
+        _flag(rng, 0.9),
+        _flag(rng, 0.6),
+        _flag(rng, 0.95),
+        _flag(rng, 0.7),
+        _flag(rng, 0.1),
+        _flag(rng, 0.05),
+        _flag(rng, 0.1),
+        _flag(rng, 0.03),
+        _flag(rng, 0.01),
+        rng.choice(['main', 'master', 'develop']),
+    ]
+
+
+def generate_repositories(path: str, rows: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+
+    with open(temporary_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for index in range(rows):
+            writer.writerow(generate_row(rng, index))
+
+    os.replace(temporary_path, path)
+    return path
+
+
+def ensure_dataset(directory: str, rows: int, seed: int = 0) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"repositories_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        generate_repositories(path, rows, seed)
+    return path
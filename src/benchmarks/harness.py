@@ -0,0 +1,150 @@
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import List, Dict, Any, Optional, Callable
+
+BenchmarkResult = Dict[str, Any]
+
+
+class Benchmark:
+    def __init__(self, name: str, func: Callable[[], Any], rows: int):
+        self.name = name
+        self.func = func
+        self.rows = rows
+
+    def _timed_run(self) -> float:
+        gc.collect()
+        start = time.perf_counter()
+        self.func()
+        return time.perf_counter() - start
+
+    def _peak_memory(self) -> int:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            self.func()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def run(self, repeat: int = 3, memory: bool = True) -> BenchmarkResult:
+        seconds = min(self._timed_run() for _ in range(max(repeat, 1)))
+        return {
+            'name': self.name,
+            'rows': self.rows,
+            'seconds': seconds,
+            'rows_per_second': self.rows / seconds if seconds > 0 else None,
+            'peak_bytes': self._peak_memory() if memory else None,
+        }
+
+
+def run_benchmarks(benchmarks: List[Benchmark], repeat: int = 3, memory: bool = True,
+                   progress: Optional[Callable[[BenchmarkResult], None]] = None) -> List[BenchmarkResult]:
+    results = list()
+    for benchmark in benchmarks:
+        result = benchmark.run(repeat, memory)
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def save_baseline(results: List[BenchmarkResult], path: str, label: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'label': label,
+            'environment': environment(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': {result['name']: result for result in results},
+        }, f, indent=2, ensure_ascii=False)
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _ratio(current: Optional[float], previous: Optional[float]) -> Optional[float]:
+    if current is None or not previous:
+        return None
+    return current / previous
+
+
+def compare_results(results: List[BenchmarkResult], baseline: Dict[str, Any],
+                    tolerance: float = 0.1) -> List[Dict[str, Any]]:
+    comparisons = list()
+    previous_results = baseline.get('results', dict())
+
+    for result in results:
+        previous = previous_results.get(result['name'])
+        if previous is None:
+            comparisons.append({'name': result['name'], 'status': 'new', 'time_ratio': None, 'memory_ratio': None})
+            continue
+
+        time_ratio = _ratio(result['seconds'], previous.get('seconds'))
+        memory_ratio = _ratio(result.get('peak_bytes'), previous.get('peak_bytes'))
+
+        if (time_ratio or 1.0) > 1 + tolerance or (memory_ratio or 1.0) > 1 + tolerance:
+            status = 'regression'
+        elif (time_ratio or 1.0) < 1 - tolerance:
+            status = 'improvement'
+        else:
+            status = 'ok'
+
+        comparisons.append({
+            'name': result['name'],
+            'status': status,
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+        })
+
+    return comparisons
+
+
+def _format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _format_ratio(ratio: Optional[float]) -> str:
+    return f"x{ratio:.2f}" if ratio is not None else '-'
+
+
+def format_result(result: BenchmarkResult) -> str:
+    throughput = result['rows_per_second']
+    return (
+        f"{result['name']:<48} {result['seconds'] * 1000:>10.2f} мс "
+        f"{throughput if throughput is not None else 0:>14,.0f} строк/с {_format_bytes(result['peak_bytes']):>12}"
+    )
+
+
+def format_comparison(comparison: Dict[str, Any]) -> str:
+    return (
+        f"{comparison['name']:<48} {comparison['status']:<12} "
+        f"время {_format_ratio(comparison['time_ratio']):>8}  память {_format_ratio(comparison['memory_ratio']):>8}"
+    )
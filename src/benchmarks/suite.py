@@ -0,0 +1,100 @@
+import os
+from typing import List, Any, Callable
+from src.python import CSVReader, DataQueryBuilder, UserStatisticsCalculator, StatisticsExporter
+from .harness import Benchmark
+
+
+def reader_benchmarks(path: str, rows: int) -> List[Benchmark]:
+    return [
+        Benchmark('reader.read', lambda: CSVReader().read(path), rows),
+        Benchmark('reader.read_infer_schema', lambda: CSVReader(infer_schema=True).read(path), rows),
+        Benchmark('reader.iter_rows', lambda: sum(1 for _ in CSVReader().iter_rows(path)), rows),
+        Benchmark('reader.read_parallel', lambda: CSVReader().read_parallel(path), rows),
+    ]
+
+
+def query_benchmarks(data: List[Any], headers: List[str]) -> List[Benchmark]:
+    def query(build: Callable[[DataQueryBuilder], Any]) -> Callable[[], Any]:
+        return lambda: build(DataQueryBuilder(data, headers))
+
+    rows = len(data)
+    return [
+        Benchmark('query.filter_sort_select', query(
+            lambda q: q.select('Name', 'Stars', 'Language').filter(lambda x: x.get('Language') == 'Python')
+            .sort_by('Stars', reverse=True).execute()
+        ), rows),
+        Benchmark('query.filter_eq_top_10', query(
+            lambda q: q.filter_eq('Language', 'Python').sort_by('Stars', reverse=True).limit(10).execute()
+        ), rows),
+        Benchmark('query.filter_range_sort', query(
+            lambda q: q.filter_range('Stars', 100).sort_by('Forks').execute()
+        ), rows),
+        Benchmark('query.group_by_language', query(lambda q: q.group_by('Language').execute()), rows),
+        Benchmark('query.group_by_language_agg', query(
+            lambda q: q.group_by('Language').agg({'Stars': ['count', 'mean', 'max', ('top', 3)]}, workers=1)
+        ), rows),
+        Benchmark('query.stream_filter', query(
+            lambda q: sum(1 for _ in q.filter_eq('License', 'MIT License').stream())
+        ), rows),
+    ]
+
+
+def statistics_benchmarks(data: List[Any]) -> List[Benchmark]:
+    def statistic(call: Callable[[UserStatisticsCalculator], Any]) -> Callable[[], Any]:
+        return lambda: call(UserStatisticsCalculator(data))
+
+    calls = {
+        'median_by_repository_size': lambda s: s.median_by_repository_size(),
+        'most_starred_repository': lambda s: s.most_starred_repository(),
+        'repos_without_language': lambda s: s.repos_without_language(),
+        'mean_starts': lambda s: s.mean_starts(),
+        'smallest_repository_size': lambda s: s.smallest_repository_size(),
+        'median_by_field': lambda s: s.median_by_field('Stars'),
+        'median_by_field_and_save': lambda s: s.median_by_field_and_save('Forks'),
+        'top_repos_by_field': lambda s: s.top_repos_by_field('Stars', 10),
+        'top_repos_by_fields': lambda s: s.top_repos_by_fields(['Stars', 'Forks', 'Issues'], 10),
+        'mean_by_field': lambda s: s.mean_by_field('Size'),
+        'count_by_field': lambda s: s.count_by_field('Language'),
+        'field_summary': lambda s: s.field_summary('Stars'),
+        'aggregate': lambda s: s.aggregate({'Stars': ['mean', 'median'], 'Size': ['min', 'max']}),
+        'percentile_by_field': lambda s: s.percentile_by_field('Stars', 90),
+        'std_by_field': lambda s: s.std_by_field('Stars'),
+    }
+    return [Benchmark(f"statistics.{name}", statistic(call), len(data)) for name, call in calls.items()]
+
+
+def exporter_benchmarks(data: List[Any], output_dir: str) -> List[Benchmark]:
+    def output(name: str) -> str:
+        return os.path.join(output_dir, name)
+
+    rows = len(data)
+    exporter = StatisticsExporter
+    return [
+        Benchmark('exporter.export_to_json', lambda: exporter.export_to_json(data), rows),
+        Benchmark('exporter.save_as_json', lambda: exporter.save_as_json(data, output('export.json')), rows),
+        Benchmark('exporter.export_to_csv', lambda: exporter.export_to_csv(data), rows),
+        Benchmark('exporter.save_as_csv', lambda: exporter.save_as_csv(data, output('export.csv')), rows),
+        Benchmark('exporter.stream_to_csv', lambda: exporter.stream_to_csv(iter(data), output('stream.csv')), rows),
+        Benchmark('exporter.stream_to_ndjson',
+                  lambda: exporter.stream_to_ndjson(iter(data), output('stream.ndjson')), rows),
+        Benchmark('exporter.save_as_columnar', lambda: exporter.save_as_columnar(data, output('export.col')), rows),
+    ]
+
+
+GROUPS = ('reader', 'query', 'statistics', 'exporter')
+
+
+def build_suite(path: str, output_dir: str, groups: List[str] = GROUPS) -> List[Benchmark]:
+    reader = CSVReader().read(path)
+    data, headers = reader.data, reader.get_headers()
+
+    benchmarks: List[Benchmark] = list()
+    if 'reader' in groups:
+        benchmarks.extend(reader_benchmarks(path, len(data)))
+    if 'query' in groups:
+        benchmarks.extend(query_benchmarks(data, headers))
+    if 'statistics' in groups:
+        benchmarks.extend(statistics_benchmarks(data))
+    if 'exporter' in groups:
+        benchmarks.extend(exporter_benchmarks(data, output_dir))
+    return benchmarks
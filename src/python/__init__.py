@@ -1,5 +1,21 @@
-from .csv_reader import CSVReader, CSVData, CSVRow
+from .csv_reader import CSVReader, CSVStream, CSVData, CSVRow
 from .query_builder import QueryData, DataQueryBuilder
 from .user import User
 from .exporter import StatisticsExporter
 from .csv_statistics import StatisticsCalculator, UserStatisticsCalculator
+from .columnar import ColumnarTable
+from .numpy_statistics import NumpyStatisticsCalculator, NumpyUserStatisticsCalculator
+from .aggregates import AGGREGATES, Aggregate, FieldAggregates
+from .incremental_statistics import IncrementalStatisticsCalculator
+from .predicates import Predicate, Eq, In, Range
+from .indexes import IndexSet, HashIndex, SortedIndex
+from .query_cache import QueryResultCache
+from .cancellation import CancellationToken
+from .query_service import QueryService
+from .dataset import PartitionedDataset, DatasetFile, DatasetQueryBuilder
+from .schema import SCHEMA_TYPES, normalize_schema, infer_schema, infer_column_type
+from .snapshot import save_snapshot, load_snapshot, load_csv
+from .columnar_file import ColumnarFile, write_columnar, read_columnar, query_columnar
+from .views import DataView, RowView
+from .sorting import external_sort
+from .profiling import Profiler, Span, profiled, stage, current_profiler
@@ -0,0 +1,490 @@
+import heapq
+import math
+import random
+from collections import Counter
+from difflib import get_close_matches
+from fractions import Fraction
+from typing import List, Dict, Any, Optional, Union, Tuple, Callable
+
+AggregateSpec = Union[str, Tuple[str, int]]
+AggregatesSpec = Dict[str, Union[AggregateSpec, List[AggregateSpec]]]
+
+
+SELECTION_CUTOFF = 32
+
+
+def select_kth(values: List[Any], k: int) -> Any:
+    if not 0 <= k < len(values):
+        raise IndexError(f"Порядковая статистика {k} вне допустимых значений.")
+
+    candidates = values
+    while len(candidates) > SELECTION_CUTOFF:
+        pivot = candidates[random.randrange(len(candidates))]
+        lower = [value for value in candidates if value < pivot]
+        if k < len(lower):
+            candidates = lower
+            continue
+
+        upper = [value for value in candidates if value > pivot]
+        equal_count = len(candidates) - len(lower) - len(upper)
+        if k < len(lower) + equal_count:
+            equal = [value for value in candidates if value == pivot]
+            return equal[k - len(lower)]
+
+        k -= len(lower) + equal_count
+        candidates = upper
+
+    return sorted(candidates)[k]
+
+
+def median_of(values: List[Any]) -> Any:
+    count = len(values)
+    if count % 2:
+        return select_kth(values, count // 2)
+    return (select_kth(values, count // 2 - 1) + select_kth(values, count // 2)) / 2
+
+
+class ExactSum:
+    def __init__(self):
+        self.int_total = 0
+        self.partials: List[float] = list()
+        self.nonfinite: Optional[float] = None
+        self.has_float = False
+
+    def add(self, value: Union[int, float]) -> None:
+        if not isinstance(value, float):
+            self.int_total += value
+            return
+
+        self.has_float = True
+        if not math.isfinite(value):
+            self.nonfinite = value if self.nonfinite is None else self.nonfinite + value
+            return
+
+        partials = self.partials
+        i = 0
+        for partial in partials:
+            if abs(value) < abs(partial):
+                value, partial = partial, value
+            high = value + partial
+            low = partial - (high - value)
+            if low:
+                partials[i] = low
+                i += 1
+            value = high
+        partials[i:] = [value]
+
+    def merge(self, other: 'ExactSum') -> None:
+        self.int_total += other.int_total
+        for partial in other.partials:
+            self.add(partial)
+        if other.nonfinite is not None:
+            self.add(other.nonfinite)
+        self.has_float = self.has_float or other.has_float
+
+    def fraction(self) -> Fraction:
+        return Fraction(self.int_total) + sum(map(Fraction, self.partials), Fraction(0))
+
+    def total(self) -> Union[int, float]:
+        if self.nonfinite is not None:
+            return self.nonfinite
+        if not self.has_float:
+            return self.int_total
+        return float(self.fraction())
+
+    def mean(self, count: int) -> Union[int, float]:
+        if self.nonfinite is not None:
+            return self.nonfinite
+        if not self.has_float:
+            total = self.int_total
+            return total // count if total % count == 0 else total / count
+        return float(self.fraction() / count)
+
+
+def check_limit(limit: int) -> None:
+    if limit < 0:
+        raise ValueError(f"Размер топа не может быть отрицательным, получено: {limit}")
+
+
+def exact_mean(values: List[Union[int, float]]) -> Union[int, float]:
+    count = len(values)
+    types = set(map(type, values))
+
+    if types <= {int, bool}:
+        total = sum(values)
+        return total // count if total % count == 0 else total / count
+
+    if types == {float}:
+        try:
+            partials = [math.fsum(values)]
+            while partials[-1] and math.isfinite(partials[0]):
+                partials.append(math.fsum(values + [-partial for partial in partials]))
+        except (ValueError, OverflowError):
+            partials = [math.nan]
+        if math.isfinite(partials[0]):
+            return float(sum(map(Fraction, partials), Fraction(0)) / count)
+
+    total = ExactSum()
+    for value in values:
+        total.add(value)
+    return total.mean(count)
+
+
+class Aggregate:
+    name = ''
+    numeric_only = True
+    returns_records = False
+
+    def add(self, value: Any, record: Any) -> None:
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+    def merge(self, other: 'Aggregate') -> None:
+        raise NotImplementedError
+
+
+class CountAggregate(Aggregate):
+    name = 'count'
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, value: Any, record: Any) -> None:
+        self.count += 1
+
+    def result(self) -> int:
+        return self.count
+
+    def merge(self, other: 'CountAggregate') -> None:
+        self.count += other.count
+
+
+class SumAggregate(Aggregate):
+    name = 'sum'
+
+    def __init__(self):
+        self.total = ExactSum()
+
+    def add(self, value: Any, record: Any) -> None:
+        self.total.add(value)
+
+    def result(self) -> Union[int, float]:
+        return self.total.total()
+
+    def merge(self, other: 'SumAggregate') -> None:
+        self.total.merge(other.total)
+
+
+class MinAggregate(Aggregate):
+    name = 'min'
+
+    def __init__(self):
+        self.value: Optional[Union[int, float]] = None
+
+    def add(self, value: Any, record: Any) -> None:
+        if self.value is None or value < self.value:
+            self.value = value
+
+    def result(self) -> Optional[Union[int, float]]:
+        return self.value
+
+    def merge(self, other: 'MinAggregate') -> None:
+        if other.value is not None:
+            self.add(other.value, None)
+
+
+class MaxAggregate(Aggregate):
+    name = 'max'
+
+    def __init__(self):
+        self.value: Optional[Union[int, float]] = None
+
+    def add(self, value: Any, record: Any) -> None:
+        if self.value is None or value > self.value:
+            self.value = value
+
+    def result(self) -> Optional[Union[int, float]]:
+        return self.value
+
+    def merge(self, other: 'MaxAggregate') -> None:
+        if other.value is not None:
+            self.add(other.value, None)
+
+
+class MeanAggregate(Aggregate):
+    name = 'mean'
+
+    def __init__(self):
+        self.count = 0
+        self.total = ExactSum()
+
+    def add(self, value: Any, record: Any) -> None:
+        self.count += 1
+        self.total.add(value)
+
+    def result(self) -> Optional[Union[int, float]]:
+        if not self.count:
+            return None
+        return self.total.mean(self.count)
+
+    def merge(self, other: 'MeanAggregate') -> None:
+        self.count += other.count
+        self.total.merge(other.total)
+
+
+class MedianAggregate(Aggregate):
+    name = 'median'
+
+    def __init__(self):
+        self.values: List[Union[int, float]] = list()
+
+    def add(self, value: Any, record: Any) -> None:
+        self.values.append(value)
+
+    def result(self) -> Optional[Union[int, float]]:
+        if not self.values:
+            return None
+        return median_of(self.values)
+
+    def merge(self, other: 'MedianAggregate') -> None:
+        self.values.extend(other.values)
+
+
+class CountsAggregate(Aggregate):
+    name = 'counts'
+    numeric_only = False
+
+    def __init__(self):
+        self.counter: Counter = Counter()
+
+    def add(self, value: Any, record: Any) -> None:
+        self.counter[value] += 1
+
+    def result(self) -> Dict[Any, int]:
+        return dict(self.counter)
+
+    def merge(self, other: 'CountsAggregate') -> None:
+        self.counter.update(other.counter)
+
+
+class TopAggregate(Aggregate):
+    name = 'top'
+    returns_records = True
+
+    def __init__(self, limit: int = 10):
+        check_limit(limit)
+        self.limit = limit
+        self.seen = 0
+        self.heap: List[Tuple[Union[int, float], int, Any]] = list()
+
+    def add(self, value: Any, record: Any) -> None:
+        self._push((value, -self.seen, record))
+        self.seen += 1
+
+    def _push(self, item: Tuple[Union[int, float], int, Any]) -> None:
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, item)
+        elif self.limit and item > self.heap[0]:
+            heapq.heapreplace(self.heap, item)
+
+    def result(self) -> List[Any]:
+        return [record for _, _, record in sorted(self.heap, reverse=True)]
+
+    def merge(self, other: 'TopAggregate') -> None:
+        for value, position, record in other.heap:
+            self._push((value, position - self.seen, record))
+        self.seen += other.seen
+
+
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[Union[int, float]] = None
+        self.max: Optional[Union[int, float]] = None
+        self.total = ExactSum()
+
+    def add(self, value: Union[int, float]) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.total.add(value)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: 'RunningStats') -> None:
+        if not other.count:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total.merge(other.total)
+
+        if self.min is None or other.min < self.min:
+            self.min = other.min
+        if self.max is None or other.max > self.max:
+            self.max = other.max
+
+    def exact_mean(self) -> Optional[Union[int, float]]:
+        return self.total.mean(self.count) if self.count else None
+
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    def std(self) -> Optional[float]:
+        variance = self.variance()
+        return math.sqrt(variance) if variance is not None else None
+
+
+class QuantileSketch:
+    def __init__(self, compression: int = 200, exact_limit: int = 10_000):
+        self.compression = compression
+        self.exact_limit = exact_limit
+        self.count = 0
+        self.buffer: List[Union[int, float]] = list()
+        self.centroids: List[Tuple[float, int]] = list()
+        self.exact = True
+
+    def add(self, value: Union[int, float]) -> None:
+        self.buffer.append(value)
+        self.count += 1
+
+        if self.exact and len(self.buffer) > self.exact_limit:
+            self.exact = False
+        if not self.exact and len(self.buffer) >= self.compression * 10:
+            self._compress()
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        self.buffer.extend(other.buffer)
+        self.centroids.extend(other.centroids)
+        self.count += other.count
+        self.exact = self.exact and other.exact and len(self.buffer) <= self.exact_limit
+        if not self.exact:
+            self._compress()
+
+    def _compress(self) -> None:
+        points = sorted(self.centroids + [(value, 1) for value in self.buffer])
+        self.buffer = list()
+        if not points:
+            return
+
+        total = sum(weight for _, weight in points)
+        merged: List[Tuple[float, int]] = list()
+        cumulative = 0
+        mean, weight = points[0]
+        for point_mean, point_weight in points[1:]:
+            quantile = (cumulative + weight + point_weight / 2) / total
+            limit = 4 * total * quantile * (1 - quantile) / self.compression
+            if weight + point_weight <= max(1.0, limit):
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append((mean, weight))
+                cumulative += weight
+                mean, weight = point_mean, point_weight
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def quantile(self, fraction: float) -> Optional[Union[int, float]]:
+        if not self.count:
+            return None
+
+        if self.exact:
+            if fraction == 0.5:
+                return median_of(self.buffer)
+            position = (self.count - 1) * fraction
+            low = int(position)
+            high = min(low + 1, self.count - 1)
+            high_value = select_kth(self.buffer, high)
+            low_value = high_value if low == high else select_kth(self.buffer, low)
+            return low_value + (high_value - low_value) * (position - low)
+
+        if self.buffer:
+            self._compress()
+
+        centroids = self.centroids
+        if len(centroids) == 1:
+            return centroids[0][0]
+
+        target = fraction * self.count
+        cumulative = 0.0
+        previous_center, previous_mean = None, None
+        for mean, weight in centroids:
+            center = cumulative + weight / 2
+            if target <= center:
+                if previous_center is None:
+                    return mean
+                share = (target - previous_center) / (center - previous_center)
+                return previous_mean + (mean - previous_mean) * share
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+        return centroids[-1][0]
+
+    def median(self) -> Optional[Union[int, float]]:
+        return self.quantile(0.5)
+
+
+AGGREGATES: Dict[str, Callable[..., Aggregate]] = {
+    aggregate.name: aggregate
+    for aggregate in (CountAggregate, SumAggregate, MinAggregate, MaxAggregate,
+                      MeanAggregate, MedianAggregate, CountsAggregate, TopAggregate)
+}
+
+
+def aggregate_key(spec: AggregateSpec) -> str:
+    if isinstance(spec, tuple):
+        name, argument = spec
+        return f"{name}_{argument}"
+    return spec
+
+
+def create_aggregate(spec: AggregateSpec) -> Aggregate:
+    name, arguments = (spec[0], spec[1:]) if isinstance(spec, tuple) else (spec, ())
+
+    if name not in AGGREGATES:
+        suggestions = get_close_matches(str(name), AGGREGATES, n=2, cutoff=0.6)
+        raise ValueError(f"Неизвестный агрегат: {name}. Подсказки: {suggestions}")
+
+    return AGGREGATES[name](*arguments)
+
+
+def normalize_spec(spec: AggregatesSpec) -> Dict[str, List[AggregateSpec]]:
+    return {
+        field: [aggregates] if isinstance(aggregates, (str, tuple)) else list(aggregates)
+        for field, aggregates in spec.items()
+    }
+
+
+class FieldAggregates:
+    def __init__(self, field: str, specs: List[AggregateSpec]):
+        self.field = field
+        self.aggregates = {aggregate_key(spec): create_aggregate(spec) for spec in specs}
+        self.numeric = [aggregate for aggregate in self.aggregates.values() if aggregate.numeric_only]
+        self.any_value = [aggregate for aggregate in self.aggregates.values() if not aggregate.numeric_only]
+
+    def add(self, value: Any, record: Any) -> None:
+        for aggregate in self.any_value:
+            aggregate.add(value, record)
+
+        if isinstance(value, (int, float)):
+            for aggregate in self.numeric:
+                aggregate.add(value, record)
+
+    def results(self, get_records: Optional[Callable[[List[Any]], List[Any]]] = None) -> Dict[str, Any]:
+        results = dict()
+        for key, aggregate in self.aggregates.items():
+            result = aggregate.result()
+            if get_records is not None and aggregate.returns_records:
+                result = get_records(result)
+            results[key] = result
+        return results
@@ -0,0 +1,40 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+from itertools import islice
+from typing import Optional, Iterable, Iterator
+from .csv_reader import CSVRow
+
+CHECK_INTERVAL = 4096
+
+
+class CancellationToken:
+    def __init__(self, timeout: Optional[float] = None):
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise CancelledError("Запрос отменён")
+        if self.expired:
+            raise TimeoutError("Превышено время выполнения запроса")
+
+    def guard(self, rows: Iterable[CSVRow]) -> Iterator[CSVRow]:
+        iterator = iter(rows)
+        while True:
+            self.raise_if_cancelled()
+            chunk = list(islice(iterator, CHECK_INTERVAL))
+            if not chunk:
+                return
+            yield from chunk
@@ -0,0 +1,345 @@
+from array import array
+from collections import Counter
+from itertools import chain, compress, repeat
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Iterable
+from .csv_reader import CSVReader, CSVData, CSVRow
+
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+_BYTE_BITS = [tuple(bool(byte >> bit & 1) for bit in range(8)) for byte in range(256)]
+
+
+class NullBitmap:
+    def __init__(self, bits: Optional[bytearray] = None, length: int = 0):
+        self.bits = bits if bits is not None else bytearray()
+        self.length = length
+
+    def append(self, valid: bool) -> None:
+        if self.length % 8 == 0:
+            self.bits.append(0)
+        if valid:
+            self.bits[-1] |= 1 << (self.length % 8)
+        self.length += 1
+
+    def is_valid(self, index: int) -> bool:
+        return bool(self.bits[index >> 3] >> (index & 7) & 1)
+
+    def __iter__(self) -> Iterator[bool]:
+        flags = chain.from_iterable(map(_BYTE_BITS.__getitem__, self.bits))
+        return compress(flags, repeat(True, self.length))
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class Column:
+    kind = 'null'
+
+    def __init__(self, length: int = 0):
+        self.length = length
+        self.null_count = length
+
+    def accepts(self, value: Any) -> bool:
+        return value is None
+
+    def append(self, value: Any) -> None:
+        self.length += 1
+        self.null_count += 1
+
+    def non_null_values(self) -> Iterable[Any]:
+        return ()
+
+    def nbytes(self) -> int:
+        return 0
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0 or index >= self.length:
+            raise IndexError(f"Индекс строки {index} вне допустимых значений.")
+        return None
+
+    def __iter__(self) -> Iterator[Any]:
+        return repeat(None, self.length)
+
+    def __len__(self) -> int:
+        return self.length
+
+
+class NumericColumn(Column):
+    kind = 'numeric'
+    typecode = 'd'
+    value_type: type = float
+
+    def __init__(self, length: int = 0):
+        super().__init__(0)
+        self.values = array(self.typecode)
+        self.validity = NullBitmap()
+        for _ in range(length):
+            self.append(None)
+
+    @classmethod
+    def from_buffers(cls, values: Any, validity: Any, length: int, null_count: int) -> 'NumericColumn':
+        column = cls()
+        column.values = values
+        column.validity = NullBitmap(validity, length)
+        column.length = length
+        column.null_count = null_count
+        return column
+
+    def accepts(self, value: Any) -> bool:
+        return value is None or type(value) is self.value_type
+
+    def append(self, value: Any) -> None:
+        if value is None:
+            self.values.append(0)
+            self.validity.append(False)
+            self.null_count += 1
+        else:
+            self.values.append(value)
+            self.validity.append(True)
+        self.length += 1
+
+    def non_null_values(self) -> Iterable[Any]:
+        if not self.null_count:
+            return self.values
+        return compress(self.values, self.validity)
+
+    def nbytes(self) -> int:
+        return self.values.itemsize * len(self.values) + len(self.validity.bits)
+
+    def __getitem__(self, index: int) -> Any:
+        if not self.validity.is_valid(index):
+            return None
+        return self.values[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        if not self.null_count:
+            return iter(self.values)
+        return (value if valid else None for value, valid in zip(self.values, self.validity))
+
+
+class IntColumn(NumericColumn):
+    kind = 'int'
+    typecode = 'q'
+    value_type = int
+
+    def accepts(self, value: Any) -> bool:
+        return value is None or (type(value) is int and INT64_MIN <= value <= INT64_MAX)
+
+
+class FloatColumn(NumericColumn):
+    kind = 'float'
+    typecode = 'd'
+    value_type = float
+
+
+class DictionaryColumn(Column):
+    kind = 'str'
+
+    def __init__(self, length: int = 0):
+        super().__init__(0)
+        self.codes = array('i')
+        self.dictionary: List[str] = list()
+        self._index: Optional[Dict[str, int]] = dict()
+        for _ in range(length):
+            self.append(None)
+
+    @classmethod
+    def from_buffers(cls, codes: Any, dictionary: Any, length: int, null_count: int) -> 'DictionaryColumn':
+        column = cls()
+        column.codes = codes
+        column.dictionary = dictionary
+        column._index = None
+        column.length = length
+        column.null_count = null_count
+        return column
+
+    def accepts(self, value: Any) -> bool:
+        return value is None or type(value) is str
+
+    def append(self, value: Any) -> None:
+        if value is None:
+            self.codes.append(-1)
+            self.null_count += 1
+        else:
+            if self._index is None:
+                self._index = {entry: code for code, entry in enumerate(self.dictionary)}
+            code = self._index.get(value)
+            if code is None:
+                code = self._index[value] = len(self.dictionary)
+                self.dictionary.append(value)
+            self.codes.append(code)
+        self.length += 1
+
+    def value_counts(self) -> Dict[Any, int]:
+        counts = Counter(self.codes)
+        return {self.dictionary[code] if code >= 0 else None: count for code, count in counts.items()}
+
+    def non_null_values(self) -> Iterable[Any]:
+        return (self.dictionary[code] for code in self.codes if code >= 0)
+
+    def nbytes(self) -> int:
+        return self.codes.itemsize * len(self.codes) + sum(len(value) for value in self.dictionary)
+
+    def __getitem__(self, index: int) -> Any:
+        code = self.codes[index]
+        return self.dictionary[code] if code >= 0 else None
+
+    def __iter__(self) -> Iterator[Any]:
+        dictionary = self.dictionary
+        return (dictionary[code] if code >= 0 else None for code in self.codes)
+
+
+class ObjectColumn(Column):
+    kind = 'object'
+
+    def __init__(self, values: Optional[List[Any]] = None):
+        values = values if values is not None else list()
+        super().__init__(len(values))
+        self.values = values
+        self.null_count = sum(1 for value in values if value is None)
+
+    def accepts(self, value: Any) -> bool:
+        return True
+
+    def append(self, value: Any) -> None:
+        self.values.append(value)
+        self.length += 1
+        if value is None:
+            self.null_count += 1
+
+    def non_null_values(self) -> Iterable[Any]:
+        return (value for value in self.values if value is not None)
+
+    def nbytes(self) -> int:
+        return 8 * len(self.values)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.values[index]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.values)
+
+
+def _column_for(value: Any, length: int) -> Column:
+    if type(value) is int and INT64_MIN <= value <= INT64_MAX:
+        return IntColumn(length)
+    if type(value) is float:
+        return FloatColumn(length)
+    if type(value) is str:
+        return DictionaryColumn(length)
+    return ObjectColumn([None] * length)
+
+
+def _promote(column: Column, value: Any) -> Column:
+    if column.kind == 'null':
+        return _column_for(value, len(column))
+    return ObjectColumn(list(column))
+
+
+class ColumnarTable:
+    def __init__(self, headers: List[str], columns: Optional[List[Column]] = None):
+        self.headers = list(headers)
+        self.columns: List[Column] = columns if columns is not None else [Column() for _ in self.headers]
+        self._positions = {header: i for i, header in enumerate(self.headers)}
+        self.length = len(self.columns[0]) if self.columns else 0
+        self.read_only = False
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[CSVRow], headers: List[str]) -> 'ColumnarTable':
+        table = cls(headers)
+        table.extend(rows)
+        return table
+
+    @classmethod
+    def from_reader(cls, reader: CSVReader) -> 'ColumnarTable':
+        if reader.data or not reader.filepath:
+            return cls.from_rows(reader.data, reader.headers)
+
+        rows = reader.iter_rows()
+        first_row = next(rows, None)
+        table = cls(reader.headers)
+        if first_row is not None:
+            table.append(first_row)
+            table.extend(rows)
+        return table
+
+    def append(self, row: CSVRow) -> None:
+        if self.read_only:
+            raise ValueError("Таблица загружена из снимка и доступна только для чтения")
+
+        columns = self.columns
+        for i, header in enumerate(self.headers):
+            value = row.get(header)
+            column = columns[i]
+            if not column.accepts(value):
+                column = columns[i] = _promote(column, value)
+            column.append(value)
+        self.length += 1
+
+    def extend(self, rows: Iterable[CSVRow]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def column(self, column_name: str) -> Column:
+        if column_name not in self._positions:
+            raise KeyError(f"Столбец '{column_name}' не найден.")
+        return self.columns[self._positions[column_name]]
+
+    def has_column(self, column_name: str) -> bool:
+        return column_name in self._positions
+
+    def numeric_values(self, column_name: str) -> List[Any]:
+        if column_name not in self._positions:
+            return list()
+
+        column = self.column(column_name)
+        if isinstance(column, NumericColumn):
+            return list(column.non_null_values())
+        if isinstance(column, ObjectColumn):
+            return [value for value in column.values if isinstance(value, (int, float))]
+        return list()
+
+    def value_counts(self, column_name: str) -> Dict[Any, int]:
+        if column_name not in self._positions:
+            return {None: self.length} if self.length else dict()
+
+        column = self.column(column_name)
+        if isinstance(column, DictionaryColumn):
+            return column.value_counts()
+        return dict(Counter(column))
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes() for column in self.columns)
+
+    def get_headers(self) -> List[str]:
+        return self.headers.copy()
+
+    def get_data(self) -> CSVData:
+        return list(self)
+
+    def get_column(self, column_name: str) -> Tuple[Any]:
+        return tuple(self.column(column_name))
+
+    def get_row(self, index: int) -> CSVRow:
+        if index < 0:
+            index += self.length
+
+        if index < 0 or index >= self.length:
+            raise IndexError(f"Индекс строки {index} вне допустимых значений.")
+
+        return {header: column[index] for header, column in zip(self.headers, self.columns)}
+
+    def get_rows(self, indices: Iterable[int]) -> CSVData:
+        return [self.get_row(index) for index in indices]
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> CSVRow:
+        return self.get_row(index)
+
+    def __iter__(self) -> Iterator[CSVRow]:
+        headers = self.headers
+        for values in zip(*self.columns):
+            yield dict(zip(headers, values))
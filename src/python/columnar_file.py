@@ -0,0 +1,261 @@
+import json
+import mmap
+import os
+import struct
+from itertools import chain, compress, islice
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+from .csv_reader import CSVReader, CSVData, CSVRow
+from .columnar import ColumnarTable, Column, NumericColumn, DictionaryColumn, ObjectColumn
+from .predicates import Predicate, Eq, In, Range
+from .query_builder import DataQueryBuilder
+from .snapshot import _column_buffers, _load_column, _padding
+
+COLUMNAR_MAGIC = b'CSVCOLS1'
+COLUMNAR_VERSION = 1
+DEFAULT_BLOCK_SIZE = 65_536
+
+_FOOTER_LENGTH = struct.Struct('<Q')
+
+
+def _column_bounds(column: Column) -> Tuple[Any, Any]:
+    if isinstance(column, NumericColumn):
+        values = [value for value in column.non_null_values() if value == value]
+    elif isinstance(column, DictionaryColumn):
+        values = column.dictionary
+    else:
+        return None, None
+
+    if not values:
+        return None, None
+    return min(values), max(values)
+
+
+def _value_may_match(value: Any, meta: Dict[str, Any]) -> bool:
+    if value is None:
+        return meta['null_count'] > 0
+    return meta['min'] <= value <= meta['max']
+
+
+def _range_may_match(predicate: Range, meta: Dict[str, Any]) -> bool:
+    low, high = meta['min'], meta['max']
+    if predicate.low is not None:
+        if high < predicate.low or (high == predicate.low and not predicate.include_low):
+            return False
+    if predicate.high is not None:
+        if low > predicate.high or (low == predicate.high and not predicate.include_high):
+            return False
+    return True
+
+
+def block_may_match(predicate: Predicate, meta: Dict[str, Any]) -> bool:
+    if meta['kind'] == ObjectColumn.kind:
+        return True
+
+    if meta['min'] is None:
+        if isinstance(predicate, Eq):
+            return predicate.value is None and meta['null_count'] > 0
+        if isinstance(predicate, In):
+            return None in predicate.values and meta['null_count'] > 0
+        return not isinstance(predicate, Range)
+
+    try:
+        if isinstance(predicate, Eq):
+            return _value_may_match(predicate.value, meta)
+        if isinstance(predicate, In):
+            return any(_value_may_match(value, meta) for value in predicate.values)
+        if isinstance(predicate, Range):
+            return _range_may_match(predicate, meta)
+    except TypeError:
+        return True
+
+    return True
+
+
+def write_columnar(records: Iterable[CSVRow], filepath: str, headers: Optional[List[str]] = None,
+                   block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    if block_size <= 0:
+        raise ValueError(f"Размер блока должен быть положительным, получено: {block_size}")
+
+    records = iter(records)
+    if headers is None:
+        first = next(records, None)
+        if not first:
+            raise ValueError("Отсутствуют заголовки для записи.")
+        headers = list(first)
+        records = chain([first], records)
+
+    blocks: List[Dict[str, Any]] = list()
+    total = 0
+    temporary_path = f"{filepath}.{os.getpid()}.tmp"
+
+    try:
+        with open(temporary_path, 'wb') as f:
+            f.write(COLUMNAR_MAGIC)
+            offset = len(COLUMNAR_MAGIC)
+
+            while True:
+                table = ColumnarTable.from_rows(islice(records, block_size), headers)
+                if not len(table):
+                    break
+
+                columns = list()
+                for column in table.columns:
+                    meta, buffers = _column_buffers(column)
+                    meta['min'], meta['max'] = _column_bounds(column)
+                    meta['buffers'] = list()
+                    for buffer in buffers:
+                        padding = _padding(len(buffer))
+                        meta['buffers'].append([offset, len(buffer)])
+                        f.write(buffer)
+                        f.write(padding)
+                        offset += len(buffer) + len(padding)
+                    columns.append(meta)
+
+                blocks.append({'rows': len(table), 'columns': columns})
+                total += len(table)
+
+            footer = json.dumps({
+                'version': COLUMNAR_VERSION,
+                'headers': headers,
+                'rows': total,
+                'blocks': blocks,
+            }, ensure_ascii=False).encode('utf-8')
+            f.write(footer)
+            f.write(_FOOTER_LENGTH.pack(len(footer)))
+            f.write(COLUMNAR_MAGIC)
+
+        os.replace(temporary_path, filepath)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return total
+
+
+class ColumnarFile:
+    def __init__(self, filepath: str):
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"Колоночный файл не найден: {filepath}")
+
+        self.filepath = filepath
+        with open(filepath, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._buffer)
+        try:
+            self._read_footer()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_footer(self) -> None:
+        filepath = self.filepath
+        suffix = _FOOTER_LENGTH.size + len(COLUMNAR_MAGIC)
+        view = self._view
+        if (len(view) < len(COLUMNAR_MAGIC) + suffix or bytes(view[:len(COLUMNAR_MAGIC)]) != COLUMNAR_MAGIC
+                or bytes(view[-len(COLUMNAR_MAGIC):]) != COLUMNAR_MAGIC):
+            raise ValueError(f"Файл {filepath} не является колоночным файлом.")
+
+        footer_length, = _FOOTER_LENGTH.unpack(view[-suffix:-len(COLUMNAR_MAGIC)])
+        footer = json.loads(str(view[-suffix - footer_length:-suffix], 'utf-8'))
+        if footer.get('version') != COLUMNAR_VERSION:
+            raise ValueError(f"Неподдерживаемая версия колоночного файла: {footer.get('version')}")
+
+        self.headers: List[str] = footer['headers']
+        self.blocks: List[Dict[str, Any]] = footer['blocks']
+        self.row_count: int = footer['rows']
+        self._positions = {header: i for i, header in enumerate(self.headers)}
+
+    @property
+    def closed(self) -> bool:
+        return self._buffer is None
+
+    def close(self) -> None:
+        if self._buffer is None:
+            return
+
+        self._view.release()
+        try:
+            self._buffer.close()
+        except BufferError:
+            pass
+        self._buffer = self._view = None
+
+    def __enter__(self) -> 'ColumnarFile':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _check_columns(self, columns: Optional[Iterable[str]]) -> List[str]:
+        if columns is None:
+            return list(self.headers)
+
+        columns = list(columns)
+        missing = [column for column in columns if column not in self._positions]
+        if missing:
+            raise KeyError(f"Столбцы не найдены: {missing}")
+        return columns
+
+    def matching_blocks(self, predicates: Iterable[Predicate] = ()) -> List[int]:
+        predicates = list(predicates)
+        self._check_columns(predicate.field for predicate in predicates)
+        return [
+            i for i, block in enumerate(self.blocks)
+            if all(block_may_match(predicate, block['columns'][self._positions[predicate.field]])
+                   for predicate in predicates)
+        ]
+
+    def read_block(self, index: int, columns: Optional[Iterable[str]] = None) -> ColumnarTable:
+        if self._buffer is None:
+            raise ValueError(f"Колоночный файл закрыт: {self.filepath}")
+        columns = self._check_columns(columns)
+        metas = self.blocks[index]['columns']
+        table = ColumnarTable(columns, [_load_column(metas[self._positions[column]], self._view, 0) for column in columns])
+        table.length = self.blocks[index]['rows']
+        table.read_only = True
+        return table
+
+    def iter_blocks(self, columns: Optional[Iterable[str]] = None,
+                    predicates: Iterable[Predicate] = ()) -> Iterator[ColumnarTable]:
+        columns = self._check_columns(columns)
+        for index in self.matching_blocks(predicates):
+            yield self.read_block(index, columns)
+
+    def iter_rows(self, columns: Optional[Iterable[str]] = None,
+                  predicates: Iterable[Predicate] = ()) -> Iterator[CSVRow]:
+        columns = self._check_columns(columns)
+        predicates = list(predicates)
+        needed = list(dict.fromkeys(columns + [predicate.field for predicate in predicates]))
+
+        for table in self.iter_blocks(needed, predicates):
+            rows = zip(*(table.column(column) for column in columns))
+            if predicates:
+                mask = [True] * len(table)
+                for predicate in predicates:
+                    mask = [keep and predicate.matches(value) for keep, value in zip(mask, table.column(predicate.field))]
+                rows = compress(rows, mask)
+
+            for values in rows:
+                yield dict(zip(columns, values))
+
+    def read(self, columns: Optional[Iterable[str]] = None, predicates: Iterable[Predicate] = ()) -> CSVData:
+        return list(self.iter_rows(columns, predicates))
+
+    def __len__(self) -> int:
+        return self.row_count
+
+
+def read_columnar(filepath: str, columns: Optional[Iterable[str]] = None, predicates: Iterable[Predicate] = (),
+                  reader: Optional[CSVReader] = None) -> CSVReader:
+    reader = reader if reader is not None else CSVReader()
+    with ColumnarFile(filepath) as source:
+        reader.filepath = filepath
+        reader.headers = source._check_columns(columns)
+        reader.data = source.read(reader.headers, predicates)
+    return reader
+
+
+def query_columnar(filepath: str, columns: Optional[Iterable[str]] = None,
+                   predicates: Iterable[Predicate] = ()) -> DataQueryBuilder:
+    reader = read_columnar(filepath, columns, predicates)
+    return DataQueryBuilder(reader.data, reader.headers)
@@ -1,62 +1,265 @@
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import io
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice, repeat
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Iterable, TextIO, Union
+import codecs
 import csv
+from .schema import Schema, SchemaSpec, normalize_schema, infer_schema, type_name
+from .views import DataView, RowView
+from .profiling import profiled, stage
 
 CSVRow = Dict[str, Any]
 CSVData = List[CSVRow]
+SchemaConflict = Tuple[int, str, str]
+
+
+def _parse_byte_range(filepath: str, start: int, stop: int, encoding: str, headers: List[str], delimiter: str,
+                      schema: Schema, strict: bool) -> Tuple[CSVData, List[SchemaConflict]]:
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        text = f.read(stop - start).decode(encoding)
+
+    reader = CSVReader(filepath, delimiter, schema=schema, strict_schema=strict)
+    reader.headers = headers
+    reader.schema = reader.declared_schema
+    rows = list(reader._convert_rows(reader._csv_reader(io.StringIO(text, newline=''))))
+    return rows, reader.schema_conflicts
 
 
 class CSVReader:
-    def __init__(self, filepath: str = None, delimiter: str = ','):
+    FALLBACK_ENCODING = 'latin-1'
+    SNIFF_BLOCK_SIZE = 1 << 20
+    PARALLEL_MIN_CHUNK_SIZE = 4 << 20
+
+    def __init__(self, filepath: str = None, delimiter: str = ',', sniff_limit: Optional[int] = None,
+                 schema: Optional[SchemaSpec] = None, infer_schema: bool = False,
+                 schema_sample_size: int = 1000, strict_schema: bool = False):
         self.filepath = filepath
         self.delimiter = delimiter
+        self.sniff_limit = sniff_limit
+        self.declared_schema = normalize_schema(schema)
+        self.infer_schema = infer_schema
+        self.schema_sample_size = schema_sample_size
+        self.strict_schema = strict_schema
+        self.schema: Schema = dict()
+        self.schema_conflicts: List[SchemaConflict] = list()
+        self.encoding: Optional[str] = None
         self.headers: List[str] = list()
         self.data: CSVData = list()
 
-    def _read_from_file(self) -> None:
+    @profiled('reader', 'detect_encoding', rows_out=lambda encoding: None)
+    def _detect_encoding(self) -> str:
+        with open(self.filepath, 'rb') as f:
+            if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+                return 'utf-8-sig'
+
+            f.seek(0)
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            remaining = self.sniff_limit
+            try:
+                while remaining is None or remaining > 0:
+                    block_size = self.SNIFF_BLOCK_SIZE if remaining is None else min(remaining, self.SNIFF_BLOCK_SIZE)
+                    block = f.read(block_size)
+                    if not block:
+                        decoder.decode(b'', final=True)
+                        break
+                    decoder.decode(block)
+                    if remaining is not None:
+                        remaining -= len(block)
+            except UnicodeDecodeError:
+                return self.FALLBACK_ENCODING
+
+        return 'utf-8'
+
+    def _open_file(self, encoding: Optional[str] = None) -> TextIO:
         if not self.filepath:
             raise ValueError("Путь к файлу не указан.")
 
         if not os.path.exists(self.filepath):
             raise FileNotFoundError(f"CSV-файл не найден: {self.filepath}")
 
-        encodings = ('utf-8', 'utf-8-sig', 'latin-1', 'cp1252')
-
-        for encoding in encodings:
-            try:
-                with open(self.filepath, 'r', encoding=encoding, newline='') as f:
-                    self._parse_csv_data(f)
-                return
-            except UnicodeDecodeError:
-                continue
+        self.encoding = encoding or self._detect_encoding()
+        return open(self.filepath, 'r', encoding=self.encoding, newline='')
 
-        with open(self.filepath, 'r', encoding='utf-8', errors='replace') as f:
-            self._parse_csv_data(f)
+    def _read_from_file(self) -> None:
+        try:
+            with self._open_file() as f:
+                self._parse_csv_data(f)
+        except UnicodeDecodeError:
+            with self._open_file(self.FALLBACK_ENCODING) as f:
+                self._parse_csv_data(f)
 
     def _read_from_string(self, data_string: str) -> None:
         lines = data_string.strip().splitlines()
         self._parse_csv_data(lines)
 
     def _parse_csv_data(self, lines: Any) -> None:
-        reader = csv.reader(lines, delimiter=self.delimiter, skipinitialspace=True)
+        with stage('reader', 'parse') as span:
+            self.data = list(self._iter_csv_data(lines))
+            span.rows_out = len(self.data)
+
+    def _csv_reader(self, lines: Iterable[str]) -> Iterator[List[str]]:
+        return csv.reader(lines, delimiter=self.delimiter, skipinitialspace=True)
 
+    def _read_header(self, reader: Iterator[List[str]]) -> Iterator[List[str]]:
         try:
             self.headers = [header.strip() for header in next(reader)]
         except StopIteration:
             raise ValueError("CSV пуст.")
 
-        self.data = list()
-        for line_num, row in enumerate(reader, start=2):
+        self.schema_conflicts = list()
+        if not self.infer_schema:
+            self.schema = dict(self.declared_schema)
+            return reader
+
+        with stage('reader', 'infer_schema') as span:
+            sample = list(islice(reader, self.schema_sample_size))
+            self.schema = {**infer_schema(self.headers, sample), **self.declared_schema}
+            span.rows_in = len(sample)
+        return chain(sample, reader)
+
+    def _iter_csv_data(self, lines: Iterable[str]) -> Iterator[CSVRow]:
+        reader = self._read_header(self._csv_reader(lines))
+        yield from self._convert_rows(reader)
+
+    def _conflict(self, index: int, header: str, value: str) -> None:
+        if self.strict_schema:
+            raise ValueError(
+                f"Значение '{value}' в столбце '{header}' не соответствует типу {type_name(self.schema[header])}"
+            )
+        self.schema_conflicts.append((index, header, value))
+
+    def _convert_rows(self, rows: Iterable[List[str]]) -> Iterator[CSVRow]:
+        headers = self.headers
+        converters = [self.schema.get(header, self._convert_value) for header in headers]
+        padding = [''] * len(headers)
+        index = 0
+
+        for row in rows:
             if not row: continue
 
-            normalized_row = row + [''] * (len(self.headers) - len(row))
+            if len(row) < len(headers):
+                row = row + padding[len(row):]
 
             row_dict: CSVRow = dict()
-            for i, header in enumerate(self.headers):
-                value = normalized_row[i].strip()
-                row_dict[header] = self._convert_value(value)
+            for header, convert, value in zip(headers, converters, row):
+                value = value.strip()
+                if not value:
+                    row_dict[header] = None
+                    continue
+
+                try:
+                    row_dict[header] = convert(value)
+                except ValueError:
+                    self._conflict(index, header, value)
+                    row_dict[header] = self._convert_value(value)
+
+            index += 1
+            yield row_dict
+
+    def _iter_file_rows(self) -> Iterator[CSVRow]:
+        emitted = 0
+        try:
+            with self._open_file() as f:
+                for row in self._iter_csv_data(f):
+                    yield row
+                    emitted += 1
+        except UnicodeDecodeError:
+            with self._open_file(self.FALLBACK_ENCODING) as f:
+                yield from islice(self._iter_csv_data(f), emitted, None)
+
+    def _split_records(self, start: int, parts: int) -> Optional[List[int]]:
+        size = os.path.getsize(self.filepath)
+        step = max((size - start) // parts, 1)
+        boundaries = [start]
+        target = start + step
+        quotes = 0
+
+        with open(self.filepath, 'rb') as f:
+            f.seek(start)
+            position = start
+            while True:
+                block = f.read(self.SNIFF_BLOCK_SIZE)
+                if not block:
+                    break
+
+                offset = 0
+                while len(boundaries) < parts:
+                    search_from = max(offset, target - position)
+                    index = block.find(b'\n', search_from) if search_from < len(block) else -1
+                    if index < 0:
+                        break
+
+                    quotes += block.count(b'"', offset, index)
+                    offset = index + 1
+                    if quotes % 2 == 0:
+                        boundaries.append(position + offset)
+                        target = max(target + step, position + offset)
+
+                quotes += block.count(b'"', offset)
+                position += len(block)
+
+        if quotes % 2:
+            return None
+
+        if boundaries[-1] < size:
+            boundaries.append(size)
+        return boundaries
+
+    def _first_record_end(self) -> Optional[int]:
+        quotes = 0
+        position = 0
+        with open(self.filepath, 'rb') as f:
+            while True:
+                block = f.read(self.SNIFF_BLOCK_SIZE)
+                if not block:
+                    return None
+
+                offset = 0
+                index = block.find(b'\n')
+                while index >= 0:
+                    quotes += block.count(b'"', offset, index)
+                    if quotes % 2 == 0:
+                        return position + index + 1
+                    offset = index + 1
+                    index = block.find(b'\n', offset)
+
+                quotes += block.count(b'"', offset)
+                position += len(block)
+
+    def _read_parallel(self, workers: int) -> None:
+        parts = min(workers, os.path.getsize(self.filepath) // self.PARALLEL_MIN_CHUNK_SIZE)
+        with stage('reader', 'split_records') as span:
+            data_start = self._first_record_end() if parts > 1 else None
+            boundaries = self._split_records(data_start, parts) if data_start is not None else None
+            span.rows_out = len(boundaries) - 1 if boundaries is not None else None
+
+        if boundaries is None or len(boundaries) < 3:
+            self._read_from_file()
+            return
 
-            self.data.append(row_dict)
+        try:
+            self._parse_ranges(boundaries)
+        except UnicodeDecodeError:
+            self._parse_ranges(boundaries, self.FALLBACK_ENCODING)
+
+    def _parse_ranges(self, boundaries: List[int], encoding: Optional[str] = None) -> None:
+        with self._open_file(encoding) as f:
+            self._read_header(self._csv_reader(f))
+
+        encoding = 'utf-8' if self.encoding == 'utf-8-sig' else self.encoding
+        self.data = list()
+        with stage('reader', 'parse_parallel', workers=len(boundaries) - 1) as span, \
+                ProcessPoolExecutor(max_workers=len(boundaries) - 1) as executor:
+            chunks = executor.map(
+                _parse_byte_range, repeat(self.filepath), boundaries[:-1], boundaries[1:], repeat(encoding),
+                repeat(self.headers), repeat(self.delimiter), repeat(self.schema), repeat(self.strict_schema)
+            )
+            for rows, conflicts in chunks:
+                self.schema_conflicts.extend((index + len(self.data), header, value) for index, header, value in conflicts)
+                self.data.extend(rows)
+            span.rows_out = len(self.data)
 
     @staticmethod
     def _convert_value(value: str) -> Any:
@@ -75,6 +278,7 @@ class CSVReader:
 
         return value
 
+    @profiled('reader', rows_out=lambda reader: len(reader.data))
     def read(self, filepath: Optional[str] = None, data_string: Optional[str] = None) -> 'CSVReader':
         if filepath:
             self.filepath = filepath
@@ -91,32 +295,121 @@ class CSVReader:
 
         return self
 
-    def get_data(self) -> CSVData:
-        return self.data.copy()
+    @profiled('reader', rows_out=lambda reader: len(reader.data))
+    def read_parallel(self, filepath: Optional[str] = None, workers: Optional[int] = None) -> 'CSVReader':
+        if filepath:
+            self.filepath = filepath
+        if workers is not None and workers <= 0:
+            raise ValueError(f"Число процессов должно быть положительным, получено: {workers}")
+
+        if not self.filepath:
+            raise ValueError("Путь к файлу не указан.")
+        if not os.path.exists(self.filepath):
+            raise FileNotFoundError(f"CSV-файл не найден: {self.filepath}")
+
+        try:
+            self._read_parallel(workers or os.cpu_count() or 1)
+        except csv.Error as e:
+            raise csv.Error(f"Ошибка загрузки CSV: {e}") from e
+
+        return self
+
+    def iter_rows(self, filepath: Optional[str] = None, data_string: Optional[str] = None) -> Iterator[CSVRow]:
+        if filepath:
+            self.filepath = filepath
+        if not self.filepath and not data_string:
+            raise ValueError('Необходимо указать filepath или data_string')
+
+        if data_string:
+            rows = self._iter_csv_data(data_string.strip().splitlines())
+        else:
+            rows = self._iter_file_rows()
+
+        try:
+            yield from rows
+        except csv.Error as e:
+            raise csv.Error(f"Ошибка загрузки CSV: {e}") from e
+
+    def iter_chunks(self, size: int, filepath: Optional[str] = None,
+                    data_string: Optional[str] = None) -> Iterator[CSVData]:
+        if size <= 0:
+            raise ValueError(f"Размер пакета должен быть положительным, получено: {size}")
+
+        chunk: CSVData = list()
+        for row in self.iter_rows(filepath, data_string):
+            chunk.append(row)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = list()
+
+        if chunk:
+            yield chunk
+
+    def stream(self, filepath: Optional[str] = None, data_string: Optional[str] = None) -> 'CSVStream':
+        return CSVStream(self, filepath, data_string)
+
+    def get_data(self, copy: bool = False) -> Union[CSVData, DataView]:
+        if copy:
+            return self.data.copy()
+        return DataView(self.data)
 
     def get_headers(self) -> List[str]:
         return self.headers.copy()
 
+    def get_encoding(self) -> Optional[str]:
+        return self.encoding
+
+    def get_schema(self) -> Schema:
+        return self.schema.copy()
+
+    def get_schema_conflicts(self) -> List[SchemaConflict]:
+        return self.schema_conflicts.copy()
+
     def get_column(self, column_name: str) -> Tuple[Any]:
         if column_name not in self.headers:
             raise KeyError(f"Столбец '{column_name}' не найден.")
 
         return tuple(row.get(column_name) for row in self.data)
 
-    def get_row(self, index: int) -> CSVRow:
+    def get_row(self, index: int, copy: bool = False) -> Union[CSVRow, RowView]:
         if index < 0:
             index += len(self.data)
 
         if index < 0 or index >= len(self.data):
             raise IndexError(f"Индекс строки {index} вне допустимых значений.")
 
-        return self.data[index].copy()
+        if copy:
+            return self.data[index].copy()
+        return RowView(self.data[index])
 
     def __len__(self) -> int:
         return len(self.data)
 
-    def __getitem__(self, index: int) -> CSVRow:
+    def __getitem__(self, index: int) -> RowView:
         return self.get_row(index)
 
     def __iter__(self):
         return iter(self.data)
+
+
+class CSVStream:
+    def __init__(self, reader: CSVReader, filepath: Optional[str] = None, data_string: Optional[str] = None):
+        if not (filepath or reader.filepath) and not data_string:
+            raise ValueError('Необходимо указать filepath или data_string')
+
+        self.reader = reader
+        self.filepath = filepath
+        self.data_string = data_string
+
+    def get_headers(self) -> List[str]:
+        if not self.reader.headers:
+            rows = iter(self)
+            next(rows, None)
+            rows.close()
+        return self.reader.get_headers()
+
+    def chunks(self, size: int) -> Iterator[CSVData]:
+        return self.reader.iter_chunks(size, self.filepath, self.data_string)
+
+    def __iter__(self) -> Iterator[CSVRow]:
+        return self.reader.iter_rows(self.filepath, self.data_string)
@@ -1,54 +1,123 @@
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Iterable, Tuple
+import heapq
 import statistics
 from collections import Counter
-from .csv_reader import CSVData, CSVRow
+from itertools import repeat
+from operator import itemgetter
+from .csv_reader import CSVReader, CSVData, CSVRow, SchemaConflict
+from .columnar import ColumnarTable
+from .aggregates import AggregatesSpec, FieldAggregates, check_limit, exact_mean, normalize_spec, median_of, select_kth
+from .schema import SchemaSpec, NUMERIC_TYPES, normalize_schema
+from .profiling import profiled, row_count
+
+
+def _check_percentile(percentile: float) -> None:
+    if not 0 <= percentile <= 100:
+        raise ValueError(f"Перцентиль должен быть в диапазоне [0, 100], получено: {percentile}")
+
+
+def _percentile_position(count: int, percentile: float) -> Tuple[int, int, float]:
+    position = (count - 1) * percentile / 100
+    low = int(position)
+    return low, min(low + 1, count - 1), position - low
+
+
+def _data_rows(calculator: 'StatisticsCalculator', *args: Any, **kwargs: Any) -> Optional[int]:
+    return row_count(calculator.data)
+
+
+def _interpolate(low: Union[int, float], high: Union[int, float], fraction: float) -> float:
+    return low + (high - low) * fraction
 
 
 class StatisticsCalculator:
-    def __init__(self, data: CSVData):
+    def __init__(self, data: Iterable[CSVRow], schema: Optional[SchemaSpec] = None,
+                 schema_conflicts: Optional[Iterable[SchemaConflict]] = None):
         self.data = data
+        self.schema = normalize_schema(schema)
+        self.trusted_fields = set()
+        if schema_conflicts is not None:
+            self.trusted_fields = set(self.schema) - {header for _, header, _ in schema_conflicts}
         self.stats: CSVRow = dict()
 
-    def median_by_field(self, field: str) -> Optional[float]:
-        values = [
+    @classmethod
+    def from_reader(cls, reader: CSVReader) -> 'StatisticsCalculator':
+        return cls(reader.data, reader.schema, reader.schema_conflicts)
+
+    def _numeric_values(self, field: str) -> List[Any]:
+        if isinstance(self.data, ColumnarTable):
+            return self.data.numeric_values(field)
+
+        if field in self.schema:
+            if self.schema[field] not in NUMERIC_TYPES:
+                return list()
+            values = (record.get(field) for record in self.data)
+            if field in self.trusted_fields:
+                return [value for value in values if value is not None]
+            return [value for value in values if isinstance(value, (int, float))]
+
+        return [
             record[field] for record in self.data
             if isinstance(record.get(field), (int, float)) and record[field] is not None
         ]
 
+    @profiled('statistics', rows_in=_data_rows)
+    def median_by_field(self, field: str) -> Optional[float]:
+        values = self._numeric_values(field)
+
         if not values:
             return None
 
-        return statistics.median(values)
+        return median_of(values)
 
+    @profiled('statistics', rows_in=_data_rows)
     def median_by_field_and_save(self, field: str) -> Optional[float]:
         median_value = self.median_by_field(field)
         self.stats[field] = median_value
         return median_value
 
+    @profiled('statistics', rows_in=_data_rows)
     def top_repos_by_field(self, field: str, limit: int = 10) -> CSVData:
-        valid_data = [record for record in self.data if isinstance(record.get(field), (int, float))]
-        return sorted(valid_data, key=lambda x: x.get(field, 0), reverse=True)[:limit]
+        check_limit(limit)
+
+        if isinstance(self.data, ColumnarTable):
+            if not self.data.has_column(field):
+                return list()
+            values = enumerate(self.data.column(field))
+            top = heapq.nlargest(limit, (item for item in values if isinstance(item[1], (int, float))), key=itemgetter(1))
+            return self.data.get_rows(index for index, _ in top)
 
+        valid_data = (record for record in self.data if isinstance(record.get(field), (int, float)))
+        return heapq.nlargest(limit, valid_data, key=itemgetter(field))
+
+    @profiled('statistics', rows_in=_data_rows)
+    def top_repos_by_fields(self, fields: List[str], limit: int = 10) -> Dict[str, CSVData]:
+        if len(fields) == 1:
+            return {fields[0]: self.top_repos_by_field(fields[0], limit)}
+
+        results = self._aggregate_fields({field: ('top', limit) for field in fields})
+        return {field: field_results[f"top_{limit}"] for field, field_results in results.items()}
+
+    @profiled('statistics', rows_in=_data_rows)
     def mean_by_field(self, field: str) -> Optional[float]:
-        values = [
-            record[field] for record in self.data
-            if isinstance(record.get(field), (int, float)) and record[field] is not None
-        ]
+        values = self._numeric_values(field)
 
         if not values:
             return None
 
         return statistics.mean(values)
 
+    @profiled('statistics', rows_in=_data_rows)
     def count_by_field(self, field: str) -> CSVRow:
+        if isinstance(self.data, ColumnarTable):
+            return self.data.value_counts(field)
+
         counter = Counter(record.get(field) for record in self.data)
         return dict(counter)
 
+    @profiled('statistics', rows_in=_data_rows)
     def field_summary(self, field: str) -> CSVRow:
-        values = [
-            record[field] for record in self.data
-            if isinstance(record.get(field), (int, float)) and record[field] is not None
-        ]
+        values = self._numeric_values(field)
 
         if not values:
             return {
@@ -63,10 +132,61 @@ class StatisticsCalculator:
             'count': len(values),
             'min': min(values),
             'max': max(values),
-            'mean': statistics.mean(values),
-            'median': statistics.median(values)
+            'mean': exact_mean(values),
+            'median': median_of(values)
         }
 
+    def _aggregate_fields(self, spec: AggregatesSpec) -> Dict[str, CSVRow]:
+        fields = [FieldAggregates(field, specs) for field, specs in normalize_spec(spec).items()]
+
+        if isinstance(self.data, ColumnarTable):
+            columns = [
+                self.data.column(field.field) if self.data.has_column(field.field) else repeat(None, len(self.data))
+                for field in fields
+            ]
+            for index, values in enumerate(zip(*columns)):
+                for field, value in zip(fields, values):
+                    field.add(value, index)
+        else:
+            for record in self.data:
+                for field in fields:
+                    field.add(record.get(field.field), record)
+
+        get_rows = self.data.get_rows if isinstance(self.data, ColumnarTable) else None
+        return {field.field: field.results(get_rows) for field in fields}
+
+    @profiled('statistics', rows_in=_data_rows)
+    def aggregate(self, spec: AggregatesSpec) -> Dict[str, CSVRow]:
+        results = self._aggregate_fields(spec)
+
+        for field, field_results in results.items():
+            for key, value in field_results.items():
+                self.stats[f"{field}_{key}"] = value
+
+        return results
+
+    @profiled('statistics', rows_in=_data_rows)
+    def percentile_by_field(self, field: str, percentile: float) -> Optional[float]:
+        _check_percentile(percentile)
+        values = self._numeric_values(field)
+
+        if not values:
+            return None
+
+        low, high, fraction = _percentile_position(len(values), percentile)
+        high_value = select_kth(values, high)
+        low_value = high_value if low == high else select_kth(values, low)
+        return _interpolate(low_value, high_value, fraction)
+
+    @profiled('statistics', rows_in=_data_rows)
+    def std_by_field(self, field: str) -> Optional[float]:
+        values = self._numeric_values(field)
+
+        if len(values) < 2:
+            return None
+
+        return statistics.stdev(values)
+
     def get_stats(self) -> CSVRow:
         return self.stats.copy()
 
@@ -75,18 +195,23 @@ class StatisticsCalculator:
 
 
 class UserStatisticsCalculator(StatisticsCalculator):
+    @profiled('statistics', rows_in=_data_rows)
     def median_by_repository_size(self):
         return self.median_by_field('Size')
 
+    @profiled('statistics', rows_in=_data_rows)
     def most_starred_repository(self) -> Optional[CSVRow]:
         top_repos = self.top_repos_by_field('Stars', 1)
         return top_repos[0] if top_repos else None
 
+    @profiled('statistics', rows_in=_data_rows)
     def repos_without_language(self) -> CSVData:
         return [record for record in self.data if not record.get('Language')]
 
+    @profiled('statistics', rows_in=_data_rows)
     def mean_starts(self):
         return self.mean_by_field('Stars')
 
+    @profiled('statistics', rows_in=_data_rows)
     def smallest_repository_size(self):
         return self.field_summary('Size')['min']
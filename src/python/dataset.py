@@ -0,0 +1,242 @@
+import glob
+import os
+import re
+from bisect import bisect_right
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+from .csv_reader import CSVReader, CSVData, CSVRow, SchemaConflict
+from .columnar import ObjectColumn
+from .columnar_file import block_may_match
+from .predicates import Predicate, Eq, In
+from .query_builder import DataQueryBuilder
+from .query_planner import QueryPlan
+from .snapshot import source_fingerprint
+
+DEFAULT_PATTERN = '*.csv'
+DISTINCT_LIMIT = 64
+PARALLEL_MIN_BYTES = 4 << 20
+
+ColumnSummary = Dict[str, Any]
+LoadedFile = Tuple[List[str], CSVData, List[SchemaConflict], Dict[str, ColumnSummary]]
+
+
+def summarize_column(values: List[Any], distinct_limit: int = DISTINCT_LIMIT) -> ColumnSummary:
+    present = [value for value in values if value is not None]
+    summary = {
+        'kind': 'summary',
+        'min': None,
+        'max': None,
+        'null_count': len(values) - len(present),
+        'distinct': None,
+    }
+
+    try:
+        distinct = set(present)
+    except TypeError:
+        summary['kind'] = ObjectColumn.kind
+        return summary
+    if len(distinct) <= distinct_limit:
+        summary['distinct'] = frozenset(distinct)
+
+    comparable = [value for value in distinct if value == value]
+    if comparable:
+        try:
+            summary['min'], summary['max'] = min(comparable), max(comparable)
+        except TypeError:
+            summary['kind'] = ObjectColumn.kind
+    return summary
+
+
+def summary_may_match(predicate: Predicate, summary: ColumnSummary) -> bool:
+    distinct = summary['distinct']
+    if distinct is not None and isinstance(predicate, (Eq, In)):
+        values = [predicate.value] if isinstance(predicate, Eq) else predicate.values
+        return any(summary['null_count'] > 0 if value is None else value in distinct for value in values)
+    return block_may_match(predicate, summary)
+
+
+def _load_file(path: str, partition: Dict[str, Any], options: Dict[str, Any], distinct_limit: int) -> LoadedFile:
+    reader = CSVReader(**options).read(path)
+    headers, rows = reader.headers, reader.data
+
+    for field, value in partition.items():
+        if field not in headers:
+            headers.append(field)
+            for row in rows:
+                row[field] = value
+
+    columns = {field: summarize_column([row.get(field) for row in rows], distinct_limit) for field in headers}
+    return headers, rows, reader.schema_conflicts, columns
+
+
+class DatasetFile:
+    def __init__(self, path: str, partition: Dict[str, Any], fingerprint: Dict[str, Any], loaded: LoadedFile):
+        self.path = path
+        self.partition = partition
+        self.fingerprint = fingerprint
+        self.headers, self.data, self.schema_conflicts, self.columns = loaded
+
+    @property
+    def row_count(self) -> int:
+        return len(self.data)
+
+    def summary(self, field: str) -> ColumnSummary:
+        summary = self.columns.get(field)
+        if summary is None:
+            return {'kind': 'summary', 'min': None, 'max': None, 'null_count': self.row_count, 'distinct': frozenset()}
+        return summary
+
+    def may_match(self, predicates: Iterable[Predicate]) -> bool:
+        return all(summary_may_match(predicate, self.summary(predicate.field)) for predicate in predicates)
+
+    def __repr__(self) -> str:
+        return f"DatasetFile({self.path!r}, строк={self.row_count}, партиция={self.partition})"
+
+
+class PartitionedDataset(Sequence):
+    def __init__(self, directory: str, pattern: str = DEFAULT_PATTERN, partition_pattern: Optional[str] = None,
+                 reader: Optional[CSVReader] = None, workers: Optional[int] = None,
+                 distinct_limit: int = DISTINCT_LIMIT, check_hash: bool = False):
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Каталог набора данных не найден: {directory}")
+        if workers is not None and workers <= 0:
+            raise ValueError(f"Число процессов должно быть положительным, получено: {workers}")
+
+        self.directory = directory
+        self.pattern = pattern
+        self.partition_pattern = re.compile(partition_pattern) if partition_pattern else None
+        self.reader = reader if reader is not None else CSVReader()
+        self.workers = workers
+        self.distinct_limit = distinct_limit
+        self.check_hash = check_hash
+        self.version = 0
+        self.files: Dict[str, DatasetFile] = dict()
+        self.headers: List[str] = list()
+        self._ordered: List[DatasetFile] = list()
+        self._offsets: List[int] = [0]
+        self.refresh()
+
+    def _reader_options(self) -> Dict[str, Any]:
+        reader = self.reader
+        return {
+            'delimiter': reader.delimiter,
+            'sniff_limit': reader.sniff_limit,
+            'schema': reader.declared_schema,
+            'infer_schema': reader.infer_schema,
+            'schema_sample_size': reader.schema_sample_size,
+            'strict_schema': reader.strict_schema,
+        }
+
+    def _discover(self) -> List[str]:
+        paths = glob.glob(os.path.join(glob.escape(self.directory), '**', self.pattern), recursive=True)
+        return sorted(path for path in paths if os.path.isfile(path))
+
+    def partition_values(self, path: str) -> Dict[str, Any]:
+        relative = os.path.relpath(path, self.directory).replace(os.sep, '/')
+        values = dict()
+
+        for segment in relative.split('/')[:-1]:
+            field, separator, value = segment.partition('=')
+            if separator and field:
+                values[field] = CSVReader._convert_value(value)
+
+        if self.partition_pattern is not None:
+            match = self.partition_pattern.search(relative)
+            if match is not None:
+                values.update(
+                    (field, CSVReader._convert_value(value))
+                    for field, value in match.groupdict().items() if value is not None
+                )
+        return values
+
+    def _load(self, paths: List[str]) -> List[LoadedFile]:
+        partitions = [self.partition_values(path) for path in paths]
+        options = self._reader_options()
+
+        workers = min(self.workers or os.cpu_count() or 1, len(paths))
+        if workers <= 1 or sum(os.path.getsize(path) for path in paths) < PARALLEL_MIN_BYTES:
+            return [_load_file(path, partition, options, self.distinct_limit) for path, partition in zip(paths, partitions)]
+
+        with ProcessPoolExecutor(workers) as executor:
+            return list(executor.map(_load_file, paths, partitions, repeat(options), repeat(self.distinct_limit)))
+
+    def refresh(self) -> Dict[str, List[str]]:
+        paths = self._discover()
+        fingerprints = {path: source_fingerprint(path, self.check_hash) for path in paths}
+
+        added = [path for path in paths if path not in self.files]
+        changed = [path for path in paths if path in self.files and self.files[path].fingerprint != fingerprints[path]]
+        removed = [path for path in self.files if path not in fingerprints]
+
+        stale = added + changed
+        loaded = dict(zip(stale, self._load(stale))) if stale else dict()
+
+        files = dict()
+        for path in paths:
+            if path in loaded:
+                files[path] = DatasetFile(path, self.partition_values(path), fingerprints[path], loaded[path])
+            else:
+                files[path] = self.files[path]
+        self.files = files
+
+        if stale or removed:
+            self._rebuild()
+        return {'added': added, 'changed': changed, 'removed': removed}
+
+    def _rebuild(self) -> None:
+        self.version += 1
+        self._ordered = list(self.files.values())
+        self.headers = list(dict.fromkeys(chain.from_iterable(file.headers for file in self._ordered)))
+        self._offsets = [0]
+        for file in self._ordered:
+            self._offsets.append(self._offsets[-1] + file.row_count)
+
+    def matching_files(self, predicates: Iterable[Predicate] = ()) -> List[DatasetFile]:
+        predicates = [predicate for predicate in predicates if isinstance(predicate, Predicate)]
+        return [file for file in self.files.values() if file.may_match(predicates)]
+
+    def iter_rows(self, predicates: Iterable[Predicate] = ()) -> Iterator[CSVRow]:
+        return chain.from_iterable(file.data for file in self.matching_files(predicates))
+
+    def get_summaries(self) -> Dict[str, Dict[str, ColumnSummary]]:
+        return {path: dict(file.columns) for path, file in self.files.items()}
+
+    def get_schema_conflicts(self) -> Dict[str, List[SchemaConflict]]:
+        return {path: list(file.schema_conflicts) for path, file in self.files.items() if file.schema_conflicts}
+
+    def query(self) -> 'DatasetQueryBuilder':
+        return DatasetQueryBuilder(self)
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Индекс {index} вне диапазона набора данных из {len(self)} строк")
+
+        position = bisect_right(self._offsets, index) - 1
+        return self._ordered[position].data[index - self._offsets[position]]
+
+    def __iter__(self) -> Iterator[CSVRow]:
+        return chain.from_iterable(file.data for file in self._ordered)
+
+
+class DatasetQueryBuilder(DataQueryBuilder):
+    def __init__(self, dataset: PartitionedDataset):
+        super().__init__(dataset, dataset.headers)
+        self.dataset = dataset
+
+    def _source_rows(self, plan: QueryPlan) -> Iterable[CSVRow]:
+        return self.dataset.iter_rows(plan.filters)
+
+    def explain(self) -> str:
+        plan = self._build_plan()
+        files = self.dataset.matching_files(plan.filters)
+        return f"{super().explain()}\n-- Файлов после отсечения: {len(files)} из {len(self.dataset.files)}"
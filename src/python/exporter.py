@@ -1,37 +1,94 @@
 import json
 import csv
 import io
-from typing import Any, Optional
-from .csv_reader import CSVData
+import os
+import gzip
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+from itertools import chain
+from typing import Any, Optional, Iterable, Iterator, List, Union, TextIO
+from .csv_reader import CSVData, CSVRow
+from .columnar_file import DEFAULT_BLOCK_SIZE, write_columnar
+from .views import DataView
+from .profiling import profiled, row_count
+
+OutputTarget = Union[str, os.PathLike, TextIO]
+
+
+@contextmanager
+def _open_output(target: OutputTarget, compress: Optional[bool]) -> Iterator[TextIO]:
+    if isinstance(target, (str, os.PathLike)):
+        if compress is None:
+            compress = os.fspath(target).endswith('.gz')
+        opener = gzip.open if compress else open
+        with opener(target, 'wt', encoding='utf-8', newline='') as f:
+            yield f
+    elif compress:
+        with gzip.open(target, 'wt', encoding='utf-8', newline='') as f:
+            yield f
+    else:
+        yield target
+
+
+def _data_rows(data: Any, *args: Any, **kwargs: Any) -> Optional[int]:
+    return row_count(data)
+
+
+def _written(count: int) -> int:
+    return count
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, DataView):
+        return list(value)
+    return str(value)
+
+
+def _is_records(data: Any) -> bool:
+    return isinstance(data, Sequence) and not isinstance(data, str) and all(
+        isinstance(item, Mapping) for item in data
+    )
+
+
+def _checked_records(records: Iterable[Any]) -> Iterator[CSVRow]:
+    for record in records:
+        if not isinstance(record, Mapping):
+            raise TypeError("Данные должны быть списком словарей")
+        yield record
 
 
 class StatisticsExporter:
     @staticmethod
+    @profiled('export', rows_in=_data_rows)
     def export_to_json(data: Any, indent: int = 2, ensure_ascii: bool = True) -> Optional[str]:
         if not data:
             return None
 
         try:
-            return json.dumps(data, indent=indent, ensure_ascii=ensure_ascii, default=str)
+            return json.dumps(data, indent=indent, ensure_ascii=ensure_ascii, default=_json_default)
         except (TypeError, ValueError) as e:
             raise ValueError(f"Ошибка сериализации JSON: {e}") from e
 
     @staticmethod
+    @profiled('export', rows_in=_data_rows)
     def save_as_json(data: Any, filepath: str, indent: int = 2, ensure_ascii: bool = True) -> None:
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii, default=str)
+                json.dump(data, f, indent=indent, ensure_ascii=ensure_ascii, default=_json_default)
         except (TypeError, ValueError) as e:
             raise ValueError(f"Ошибка сериализации JSON: {e}") from e
         except IOError as e:
             raise IOError(f"Ошибка записи в файл {filepath}: {e}") from e
 
     @staticmethod
+    @profiled('export', rows_in=_data_rows)
     def export_to_csv(data: CSVData, delimiter: str = ',') -> Optional[str]:
         if not data:
             return None
 
-        if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        if not _is_records(data):
             raise TypeError("Данные должны быть списком словарей")
 
         fieldnames = sorted({key for record in data for key in record.keys()})
@@ -59,8 +116,9 @@ class StatisticsExporter:
             output.close()
 
     @staticmethod
+    @profiled('export', rows_in=_data_rows)
     def save_as_csv(data: CSVData, filepath: str, delimiter: str = ',') -> None:
-        if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        if not _is_records(data):
             raise TypeError("Данные должны быть списком словарей")
 
         fieldnames = sorted({key for record in data for key in record.keys()})
@@ -83,3 +141,68 @@ class StatisticsExporter:
             raise ValueError(f"Ошибка записи CSV: {e}") from e
         except IOError as e:
             raise IOError(f"Ошибка записи в файл {filepath}: {e}") from e
+
+    @staticmethod
+    @profiled('export', rows_in=_data_rows, rows_out=_written)
+    def stream_to_csv(records: Iterable[CSVRow], target: OutputTarget, fieldnames: Optional[List[str]] = None,
+                      delimiter: str = ',', compress: Optional[bool] = None) -> int:
+        records = _checked_records(records)
+
+        if fieldnames is None:
+            first = next(records, None)
+            if first is None or not first:
+                raise ValueError("Отсутствуют заголовки для записи.")
+            fieldnames = list(first)
+            records = chain([first], records)
+
+        written = 0
+        try:
+            with _open_output(target, compress) as f:
+                writer = csv.DictWriter(
+                    f,
+                    fieldnames=fieldnames,
+                    delimiter=delimiter,
+                    quoting=csv.QUOTE_MINIMAL,
+                    extrasaction='ignore'
+                )
+                writer.writeheader()
+                for record in records:
+                    writer.writerow(record)
+                    written += 1
+        except csv.Error as e:
+            raise ValueError(f"Ошибка записи CSV: {e}") from e
+        except IOError as e:
+            raise IOError(f"Ошибка записи в файл {target}: {e}") from e
+
+        return written
+
+    @staticmethod
+    @profiled('export', rows_in=_data_rows, rows_out=_written)
+    def stream_to_ndjson(records: Iterable[Any], target: OutputTarget, ensure_ascii: bool = True,
+                         compress: Optional[bool] = None) -> int:
+        encoder = json.JSONEncoder(ensure_ascii=ensure_ascii, default=_json_default)
+
+        written = 0
+        try:
+            with _open_output(target, compress) as f:
+                for record in records:
+                    f.write(encoder.encode(record))
+                    f.write('\n')
+                    written += 1
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Ошибка сериализации JSON: {e}") from e
+        except IOError as e:
+            raise IOError(f"Ошибка записи в файл {target}: {e}") from e
+
+        return written
+
+    @staticmethod
+    @profiled('export', rows_in=_data_rows, rows_out=_written)
+    def save_as_columnar(data: Union[CSVRow, Iterable[CSVRow]], filepath: str,
+                         fieldnames: Optional[List[str]] = None, block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+        records = _checked_records([data] if isinstance(data, Mapping) else data)
+
+        try:
+            return write_columnar(records, filepath, fieldnames, block_size)
+        except IOError as e:
+            raise IOError(f"Ошибка записи в файл {filepath}: {e}") from e
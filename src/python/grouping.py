@@ -0,0 +1,114 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple, Sequence
+from .csv_reader import CSVRow
+from .cancellation import CancellationToken
+from .aggregates import AGGREGATES, AggregateSpec, FieldAggregates, aggregate_key, normalize_spec, AggregatesSpec
+
+PARALLEL_MIN_ROWS = 50_000
+GROUPING_SCALARS = (int, float, bool)
+
+PartitionResults = List[Tuple[Any, int, Dict[str, CSVRow]]]
+GroupResults = Dict[Any, Tuple[int, Dict[str, CSVRow]]]
+
+
+def grouping_key(value: Any) -> str:
+    if value is None:
+        return "__NULL__"
+    elif isinstance(value, (str, int, float, bool)):
+        return str(value)
+    elif isinstance(value, (list, tuple)):
+        return f"__LIST__{json.dumps(value, sort_keys=True, default=str)}"
+    elif isinstance(value, dict):
+        return f"__DICT__{json.dumps(value, sort_keys=True, default=str)}"
+    return str(value)
+
+
+def _partition_key(value: Any) -> Any:
+    value_type = type(value)
+    if value_type is str or value is None:
+        return value
+    if value_type in GROUPING_SCALARS:
+        return value_type, (value if value == value else None)
+    return object, grouping_key(value)
+
+
+def _aggregate_partition(specs: Dict[str, List[AggregateSpec]], positions: Sequence[int], keys: List[Any],
+                         columns: List[List[Any]], cancellation: Optional[CancellationToken] = None) -> PartitionResults:
+    groups: Dict[Any, List[int]] = dict()
+    for offset, key in enumerate(keys if cancellation is None else cancellation.guard(keys)):
+        offsets = groups.get(key)
+        if offsets is None:
+            groups[key] = [offset]
+        else:
+            offsets.append(offset)
+
+    results = list()
+    for key, offsets in groups.items():
+        if cancellation is not None:
+            cancellation.raise_if_cancelled()
+        group_results = dict()
+        for (field, field_specs), values in zip(specs.items(), columns):
+            aggregates = FieldAggregates(field, field_specs)
+            for offset in offsets:
+                aggregates.add(values[offset], positions[offset])
+            group_results[field] = aggregates.results()
+        results.append((key, positions[offsets[0]], group_results))
+    return results
+
+
+def _record_keys(specs: Dict[str, List[AggregateSpec]]) -> Dict[str, List[str]]:
+    record_keys = dict()
+    for field, field_specs in specs.items():
+        keys = [
+            aggregate_key(spec) for spec in field_specs
+            if getattr(AGGREGATES.get(spec[0] if isinstance(spec, tuple) else spec), 'returns_records', False)
+        ]
+        if keys:
+            record_keys[field] = keys
+    return record_keys
+
+
+def _output_key(value: Any, groups: GroupResults) -> Any:
+    if (value is None or type(value) is str or type(value) in GROUPING_SCALARS) and value not in groups:
+        return value
+    key = grouping_key(value)
+    return key if key not in groups else (type(value).__name__, key)
+
+
+def aggregate_groups(rows: Sequence[CSVRow], field: str, spec: AggregatesSpec, workers: Optional[int] = None,
+                     cancellation: Optional[CancellationToken] = None) -> GroupResults:
+    specs = normalize_spec(spec)
+    keys = [_partition_key(row.get(field)) for row in rows]
+    columns = [[row.get(name) for row in rows] for name in specs]
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(rows) < PARALLEL_MIN_ROWS:
+        partitions = [_aggregate_partition(specs, range(len(rows)), keys, columns, cancellation)]
+    else:
+        owned: List[List[int]] = [list() for _ in range(workers)]
+        for position, key in enumerate(keys):
+            owned[hash(key) % workers].append(position)
+
+        partition_keys = [[keys[position] for position in positions] for positions in owned]
+        partition_columns = [[[column[position] for position in positions] for column in columns] for positions in owned]
+
+        partitions = list()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for partition in executor.map(_aggregate_partition, repeat(specs), owned, partition_keys, partition_columns):
+                if cancellation is not None:
+                    cancellation.raise_if_cancelled()
+                partitions.append(partition)
+
+    record_keys = _record_keys(specs)
+    groups: GroupResults = dict()
+    for _, first, results in sorted(chain.from_iterable(partitions), key=itemgetter(1)):
+        for name, keys in record_keys.items():
+            for key in keys:
+                results[name][key] = [rows[position] for position in results[name][key]]
+
+        groups[_output_key(rows[first].get(field), groups)] = (first, results)
+    return groups
@@ -0,0 +1,139 @@
+from typing import List, Dict, Optional, Iterable
+from .csv_reader import CSVData, CSVRow
+from .aggregates import RunningStats, QuantileSketch, CountsAggregate, TopAggregate
+from .csv_statistics import _check_percentile
+
+
+class IncrementalStatisticsCalculator:
+    def __init__(self, count_fields: Iterable[str] = ('Language',),
+                 top_fields: Iterable[str] = ('Stars', 'Commits'), limit: int = 10,
+                 compression: int = 200, exact_limit: int = 10_000):
+        self.limit = limit
+        self.compression = compression
+        self.exact_limit = exact_limit
+        self.row_count = 0
+        self.numeric: Dict[str, RunningStats] = dict()
+        self.sketches: Dict[str, QuantileSketch] = dict()
+        self.counts: Dict[str, CountsAggregate] = {field: CountsAggregate() for field in count_fields}
+        self.tops: Dict[str, TopAggregate] = {field: TopAggregate(limit) for field in top_fields}
+        self.stats: CSVRow = dict()
+
+    def _field_state(self, field: str) -> RunningStats:
+        state = self.numeric.get(field)
+        if state is None:
+            state = self.numeric[field] = RunningStats()
+            self.sketches[field] = QuantileSketch(self.compression, self.exact_limit)
+        return state
+
+    def add_row(self, row: CSVRow) -> None:
+        self.row_count += 1
+
+        for field, value in row.items():
+            if isinstance(value, (int, float)):
+                self._field_state(field).add(value)
+                self.sketches[field].add(value)
+
+        for field, counts in self.counts.items():
+            counts.add(row.get(field), row)
+
+        for field, top in self.tops.items():
+            value = row.get(field)
+            if isinstance(value, (int, float)):
+                top.add(value, row)
+
+    def add_rows(self, rows: Iterable[CSVRow]) -> 'IncrementalStatisticsCalculator':
+        for row in rows:
+            self.add_row(row)
+        return self
+
+    def merge(self, other: 'IncrementalStatisticsCalculator') -> 'IncrementalStatisticsCalculator':
+        if self.limit != other.limit or set(self.tops) != set(other.tops) or set(self.counts) != set(other.counts):
+            raise ValueError("Нельзя объединить калькуляторы с разными настройками полей и топов")
+
+        self.row_count += other.row_count
+        for field, state in other.numeric.items():
+            self._field_state(field).merge(state)
+            self.sketches[field].merge(other.sketches[field])
+
+        for field, counts in other.counts.items():
+            self.counts[field].merge(counts)
+
+        for field, top in other.tops.items():
+            self.tops[field].merge(top)
+
+        return self
+
+    def median_by_field(self, field: str) -> Optional[float]:
+        sketch = self.sketches.get(field)
+        return sketch.median() if sketch is not None else None
+
+    def percentile_by_field(self, field: str, percentile: float) -> Optional[float]:
+        _check_percentile(percentile)
+        sketch = self.sketches.get(field)
+        return sketch.quantile(percentile / 100) if sketch is not None else None
+
+    def mean_by_field(self, field: str) -> Optional[float]:
+        state = self.numeric.get(field)
+        return state.exact_mean() if state is not None else None
+
+    def std_by_field(self, field: str) -> Optional[float]:
+        state = self.numeric.get(field)
+        return state.std() if state is not None else None
+
+    def top_repos_by_field(self, field: str, limit: Optional[int] = None) -> CSVData:
+        if field not in self.tops:
+            raise ValueError(f"Топ по полю '{field}' не отслеживается. Доступные поля: {list(self.tops)}")
+
+        limit = self.limit if limit is None else limit
+        if limit > self.limit:
+            raise ValueError(f"Запрошен топ-{limit}, а отслеживается только топ-{self.limit}")
+
+        return self.tops[field].result()[:limit]
+
+    def count_by_field(self, field: str) -> CSVRow:
+        if field not in self.counts:
+            raise ValueError(f"Подсчёт по полю '{field}' не отслеживается. Доступные поля: {list(self.counts)}")
+
+        return self.counts[field].result()
+
+    def field_summary(self, field: str) -> CSVRow:
+        state = self.numeric.get(field)
+
+        if state is None:
+            return {
+                'count': 0,
+                'min': None,
+                'max': None,
+                'mean': None,
+                'median': None
+            }
+
+        return {
+            'count': state.count,
+            'min': state.min,
+            'max': state.max,
+            'mean': state.exact_mean(),
+            'median': self.median_by_field(field)
+        }
+
+    def summary(self) -> CSVRow:
+        for field in self.numeric:
+            for key, value in self.field_summary(field).items():
+                self.stats[f"{field}_{key}"] = value
+
+        for field in self.counts:
+            self.stats[f"{field}_counts"] = self.count_by_field(field)
+
+        for field in self.tops:
+            self.stats[f"{field}_top_{self.limit}"] = self.top_repos_by_field(field)
+
+        return self.get_stats()
+
+    def get_numeric_fields(self) -> List[str]:
+        return list(self.numeric)
+
+    def get_stats(self) -> CSVRow:
+        return self.stats.copy()
+
+    def clear_stats(self) -> None:
+        self.stats.clear()
@@ -0,0 +1,145 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Sequence
+from .csv_reader import CSVRow
+from .predicates import Predicate, Eq, In, Range
+from .grouping import grouping_key
+
+
+class HashIndex:
+    kind = 'hash'
+
+    def __init__(self, data: Sequence[CSVRow], field: str):
+        self.field = field
+        self.length = len(data)
+        self.buckets: Dict[Any, List[int]] = defaultdict(list)
+        self.group_keys: Dict[Any, str] = dict()
+        self.groupable = True
+
+        for position, row in enumerate(data):
+            value = row.get(field)
+            self.buckets[value].append(position)
+
+            key = grouping_key(value)
+            if self.group_keys.setdefault(value, key) != key:
+                self.groupable = False
+
+        self.buckets = dict(self.buckets)
+
+    def lookup(self, predicate: Predicate) -> Optional[List[int]]:
+        if isinstance(predicate, Eq):
+            return list(self.buckets.get(predicate.value, ()))
+        if isinstance(predicate, In):
+            return sorted(position for value in predicate.values for position in self.buckets.get(value, ()))
+        return None
+
+
+class SortedIndex:
+    kind = 'sorted'
+
+    def __init__(self, data: Sequence[CSVRow], field: str):
+        self.field = field
+        self.length = len(data)
+        entries = [(row.get(field), position) for position, row in enumerate(data) if row.get(field) is not None]
+
+        try:
+            entries.sort()
+        except TypeError as e:
+            raise ValueError(f"Поле '{field}' содержит несравнимые значения, сортированный индекс невозможен") from e
+
+        self.keys = [value for value, _ in entries]
+        self.positions = [position for _, position in entries]
+
+    def _range(self, predicate: Range) -> List[int]:
+        start, stop = 0, len(self.keys)
+        if predicate.low is not None:
+            bisect = bisect_left if predicate.include_low else bisect_right
+            start = bisect(self.keys, predicate.low)
+        if predicate.high is not None:
+            bisect = bisect_right if predicate.include_high else bisect_left
+            stop = bisect(self.keys, predicate.high)
+        return sorted(self.positions[start:stop]) if start < stop else list()
+
+    def lookup(self, predicate: Predicate) -> Optional[List[int]]:
+        if isinstance(predicate, Eq) and predicate.value is None:
+            return None
+        if isinstance(predicate, In) and None in predicate.values:
+            return None
+
+        if isinstance(predicate, Range):
+            return self._safe_range(predicate)
+        if isinstance(predicate, Eq):
+            return self._safe_range(Range(self.field, predicate.value, predicate.value))
+        if isinstance(predicate, In):
+            return sorted(
+                position for value in set(predicate.values)
+                for position in self._safe_range(Range(self.field, value, value))
+            )
+        return None
+
+    def _safe_range(self, predicate: Range) -> List[int]:
+        try:
+            return self._range(predicate)
+        except TypeError:
+            return list()
+
+
+INDEX_TYPES = {index.kind: index for index in (HashIndex, SortedIndex)}
+
+
+class IndexSet:
+    def __init__(self, data: Sequence[CSVRow]):
+        self.data = data
+        self.indexes: Dict[str, Dict[str, Any]] = defaultdict(dict)
+
+    def create_index(self, field: str, kind: str = 'hash') -> Any:
+        if kind not in INDEX_TYPES:
+            raise ValueError(f"Неизвестный тип индекса: {kind}. Доступные: {list(INDEX_TYPES)}")
+
+        index = self.indexes[field][kind] = INDEX_TYPES[kind](self.data, field)
+        return index
+
+    def covers(self, data: Any) -> bool:
+        if data is not self.data:
+            return False
+        length = len(data)
+        return all(index.length == length for kinds in self.indexes.values() for index in kinds.values())
+
+    def get_index(self, field: str, kind: str) -> Optional[Any]:
+        return self.indexes.get(field, dict()).get(kind)
+
+    def has_index(self, field: str, kind: Optional[str] = None) -> bool:
+        if kind is None:
+            return bool(self.indexes.get(field))
+        return self.get_index(field, kind) is not None
+
+    def drop_index(self, field: str, kind: Optional[str] = None) -> None:
+        if kind is None:
+            self.indexes.pop(field, None)
+        else:
+            self.indexes.get(field, dict()).pop(kind, None)
+
+    def lookup(self, predicate: Predicate) -> Optional[List[int]]:
+        for index in self.indexes.get(predicate.field, dict()).values():
+            positions = index.lookup(predicate)
+            if positions is not None:
+                return positions
+        return None
+
+    def rebuilt(self, data: Sequence[CSVRow]) -> 'IndexSet':
+        indexes = IndexSet(data)
+        for field, kinds in self.indexes.items():
+            for kind in kinds:
+                indexes.create_index(field, kind)
+        return indexes
+
+    def rebuild(self, data: Optional[Sequence[CSVRow]] = None) -> None:
+        if data is not None:
+            self.data = data
+
+        for field, kinds in self.indexes.items():
+            for kind in kinds:
+                kinds[kind] = INDEX_TYPES[kind](self.data, field)
+
+    def get_indexed_fields(self) -> List[str]:
+        return [field for field, kinds in self.indexes.items() if kinds]
@@ -0,0 +1,199 @@
+import statistics
+from fractions import Fraction
+from itertools import compress
+from typing import Dict, Any, Optional, Iterable, Tuple
+from .csv_reader import CSVRow, SchemaConflict
+from .schema import SchemaSpec, NUMERIC_TYPES
+from .columnar import ColumnarTable, IntColumn, FloatColumn
+from .csv_statistics import (
+    StatisticsCalculator, UserStatisticsCalculator,
+    _check_percentile, _percentile_position, _interpolate, _data_rows,
+)
+from .profiling import profiled
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class NumpyStatisticsCalculator(StatisticsCalculator):
+    def __init__(self, data: Iterable[CSVRow], schema: Optional[SchemaSpec] = None,
+                 schema_conflicts: Optional[Iterable[SchemaConflict]] = None):
+        if np is None:
+            raise ImportError("Для NumpyStatisticsCalculator необходим пакет numpy")
+
+        super().__init__(data, schema, schema_conflicts)
+        self._columns: Dict[str, Optional[Tuple[Any, Any]]] = dict()
+        self._valid_values: Dict[str, Any] = dict()
+
+    def _extract_column(self, field: str) -> Optional[Tuple[Any, Any]]:
+        if isinstance(self.data, ColumnarTable):
+            if not self.data.has_column(field):
+                return np.zeros(0, dtype=np.float64), np.zeros(0, dtype=bool)
+
+            column = self.data.column(field)
+            if isinstance(column, (IntColumn, FloatColumn)):
+                dtype = np.int64 if isinstance(column, IntColumn) else np.float64
+                values = np.frombuffer(column.values, dtype=dtype)
+                bits = np.frombuffer(column.validity.bits, dtype=np.uint8)
+                mask = np.unpackbits(bits, bitorder='little')[:len(column)].astype(bool)
+                return values, mask
+
+            raw = list(column)
+        else:
+            raw = [record.get(field) for record in self.data]
+
+        if field in self.schema and self.schema[field] not in NUMERIC_TYPES:
+            mask = np.zeros(len(raw), dtype=bool)
+            types = set()
+        elif field in self.trusted_fields:
+            mask = np.fromiter((value is not None for value in raw), dtype=bool, count=len(raw))
+            types = {self.schema[field]} if mask.any() else set()
+        else:
+            mask = np.fromiter((isinstance(value, (int, float)) for value in raw), dtype=bool, count=len(raw))
+            types = set(map(type, compress(raw, mask)))
+
+        if types and types != {int} and types != {float}:
+            return None
+
+        numeric = [value if valid else 0 for value, valid in zip(raw, mask)]
+        if types == {float}:
+            return np.array(numeric, dtype=np.float64), mask
+        try:
+            return np.array(numeric, dtype=np.int64), mask
+        except OverflowError:
+            return None
+
+    def column_array(self, field: str) -> Optional[Tuple[Any, Any]]:
+        if field not in self._columns:
+            self._columns[field] = self._extract_column(field)
+        return self._columns[field]
+
+    def _valid(self, field: str) -> Any:
+        if field not in self._valid_values:
+            column = self.column_array(field)
+            if column is None:
+                self._valid_values[field] = None
+            else:
+                values, mask = column
+                self._valid_values[field] = values if mask.all() else values[mask]
+        return self._valid_values[field]
+
+    @staticmethod
+    def _order_statistics(values: Any, *positions: int) -> Tuple[Any, ...]:
+        partitioned = np.partition(values, sorted(set(positions)))
+        return tuple(partitioned[position].item() for position in positions)
+
+    def _median(self, values: Any) -> Optional[float]:
+        count = len(values)
+        if count % 2:
+            return self._order_statistics(values, count // 2)[0]
+
+        low, high = self._order_statistics(values, count // 2 - 1, count // 2)
+        return (low + high) / 2
+
+    def _mean(self, values: Any) -> float:
+        count = len(values)
+        if values.dtype == np.int64:
+            bound = max(abs(values.min().item()), abs(values.max().item()))
+            total = int(values.sum()) if bound * count < 2 ** 63 else sum(values.tolist())
+            return total // count if total % count == 0 else total / count
+        if not np.isfinite(values).all():
+            return float(values.sum()) / count
+
+        mantissas, exponents = np.frexp(values)
+        mantissas = (mantissas * 2.0 ** 53).astype(np.int64)
+        order = np.argsort(exponents, kind='stable')
+        mantissas, exponents = mantissas[order], exponents[order]
+        starts = np.flatnonzero(np.r_[True, exponents[1:] != exponents[:-1]])
+
+        high = np.add.reduceat(mantissas >> 26, starts)
+        low = np.add.reduceat(mantissas & ((1 << 26) - 1), starts)
+        total = sum(
+            Fraction((int(h) << 26) + int(l)) * Fraction(2) ** (int(exponent) - 53)
+            for h, l, exponent in zip(high, low, exponents[starts])
+        )
+        return float(total / count)
+
+    @profiled('statistics', rows_in=_data_rows)
+    def median_by_field(self, field: str) -> Optional[float]:
+        values = self._valid(field)
+        if values is None:
+            return super().median_by_field(field)
+
+        if not len(values):
+            return None
+
+        return self._median(values)
+
+    @profiled('statistics', rows_in=_data_rows)
+    def mean_by_field(self, field: str) -> Optional[float]:
+        values = self._valid(field)
+        if values is None:
+            return super().mean_by_field(field)
+
+        if not len(values):
+            return None
+
+        return self._mean(values)
+
+    @profiled('statistics', rows_in=_data_rows)
+    def percentile_by_field(self, field: str, percentile: float) -> Optional[float]:
+        _check_percentile(percentile)
+        values = self._valid(field)
+        if values is None:
+            return super().percentile_by_field(field, percentile)
+
+        if not len(values):
+            return None
+
+        low, high, fraction = _percentile_position(len(values), percentile)
+        low_value, high_value = self._order_statistics(values, low, high)
+        return _interpolate(low_value, high_value, fraction)
+
+    @profiled('statistics', rows_in=_data_rows)
+    def std_by_field(self, field: str) -> Optional[float]:
+        values = self._valid(field)
+        if values is None:
+            return super().std_by_field(field)
+
+        if len(values) < 2:
+            return None
+
+        return statistics.stdev(values.tolist())
+
+    @profiled('statistics', rows_in=_data_rows)
+    def field_summary(self, field: str) -> CSVRow:
+        values = self._valid(field)
+        if values is None:
+            return super().field_summary(field)
+
+        if not len(values):
+            return {
+                'count': 0,
+                'min': None,
+                'max': None,
+                'mean': None,
+                'median': None
+            }
+
+        return {
+            'count': len(values),
+            'min': values.min().item(),
+            'max': values.max().item(),
+            'mean': self._mean(values),
+            'median': self._median(values)
+        }
+
+    def clear_cache(self) -> None:
+        self._columns.clear()
+        self._valid_values.clear()
+
+
+class NumpyUserStatisticsCalculator(UserStatisticsCalculator, NumpyStatisticsCalculator):
+    pass
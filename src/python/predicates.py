@@ -0,0 +1,90 @@
+from typing import Any, Iterable, Optional, Tuple
+from .csv_reader import CSVRow
+
+
+class Predicate:
+    op = ''
+
+    def __init__(self, field: str):
+        self.field = field
+
+    def matches(self, value: Any) -> bool:
+        raise NotImplementedError
+
+    def canonical(self) -> Tuple:
+        raise NotImplementedError
+
+    def __call__(self, row: CSVRow) -> bool:
+        return self.matches(row.get(self.field))
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Predicate) and self.canonical() == other.canonical()
+
+    def __hash__(self) -> int:
+        return hash(self.canonical())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self.canonical()[1:]}"
+
+
+class Eq(Predicate):
+    op = 'eq'
+
+    def __init__(self, field: str, value: Any):
+        super().__init__(field)
+        self.value = value
+
+    def matches(self, value: Any) -> bool:
+        return value == self.value
+
+    def canonical(self) -> Tuple:
+        return self.op, self.field, self.value
+
+
+class In(Predicate):
+    op = 'in'
+
+    def __init__(self, field: str, values: Iterable[Any]):
+        super().__init__(field)
+        self.values = tuple(dict.fromkeys(values))
+        self._lookup = frozenset(self.values)
+
+    def matches(self, value: Any) -> bool:
+        return value in self._lookup
+
+    def canonical(self) -> Tuple:
+        return self.op, self.field, tuple(sorted(self.values, key=repr))
+
+
+class Range(Predicate):
+    op = 'range'
+
+    def __init__(self, field: str, low: Optional[Any] = None, high: Optional[Any] = None,
+                 include_low: bool = True, include_high: bool = True):
+        if low is None and high is None:
+            raise ValueError(f"Для диапазона по полю '{field}' нужна хотя бы одна граница")
+
+        super().__init__(field)
+        self.low = low
+        self.high = high
+        self.include_low = include_low
+        self.include_high = include_high
+
+    def matches(self, value: Any) -> bool:
+        if value is None:
+            return False
+
+        try:
+            if self.low is not None:
+                if value < self.low or (value == self.low and not self.include_low):
+                    return False
+            if self.high is not None:
+                if value > self.high or (value == self.high and not self.include_high):
+                    return False
+        except TypeError:
+            return False
+
+        return True
+
+    def canonical(self) -> Tuple:
+        return self.op, self.field, self.low, self.high, self.include_low, self.include_high
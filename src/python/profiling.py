@@ -0,0 +1,261 @@
+import functools
+import time
+import tracemalloc
+from collections.abc import Mapping, Sized
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+
+Hook = Callable[['Span'], None]
+
+
+class Span:
+    __slots__ = (
+        'stage', 'name', 'depth', 'parent', 'rows_in', 'rows_out', 'seconds',
+        'allocated_bytes', 'peak_bytes', 'metadata', '_memory_start', '_peak',
+    )
+
+    def __init__(self, stage: str, name: str, rows_in: Optional[int] = None, depth: int = 0,
+                 parent: Optional[int] = None, metadata: Optional[Dict[str, Any]] = None):
+        self.stage = stage
+        self.name = name
+        self.depth = depth
+        self.parent = parent
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.seconds: Optional[float] = None
+        self.allocated_bytes: Optional[int] = None
+        self.peak_bytes: Optional[int] = None
+        self.metadata = metadata or dict()
+        self._memory_start = 0
+        self._peak = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.stage,
+            'name': self.name,
+            'depth': self.depth,
+            'parent': self.parent,
+            'seconds': self.seconds,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'allocated_bytes': self.allocated_bytes,
+            'peak_bytes': self.peak_bytes,
+            'metadata': dict(self.metadata),
+        }
+
+    def __repr__(self) -> str:
+        return f"Span({self.stage}.{self.name}, {self.seconds}s, {self.rows_in}->{self.rows_out})"
+
+
+_active_profiler: ContextVar[Optional['Profiler']] = ContextVar('active_profiler', default=None)
+
+
+class MeteredRows:
+    __slots__ = ('span', '_rows', '_pipeline')
+
+    def __init__(self, rows: Iterable[Any], span: Span, pipeline: 'Pipeline'):
+        self.span = span
+        self._rows = iter(rows)
+        self._pipeline = pipeline
+
+    def __iter__(self) -> 'MeteredRows':
+        return self
+
+    def __next__(self) -> Any:
+        row = self._pipeline._timed(self.span, next, self._rows)
+        self.span.rows_out += 1
+        return row
+
+
+class Pipeline:
+    def __init__(self, profiler: 'Profiler', stage_name: str, rows_in: Optional[int] = None):
+        self.profiler = profiler
+        self.stage_name = stage_name
+        self.rows_in = rows_in
+        self.stages: List[Tuple[Span, Any]] = list()
+        self.closed = False
+        self._nested: List[float] = list()
+
+    def _timed(self, span: Span, func: Callable[..., Any], *args: Any) -> Any:
+        nested = self._nested
+        nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            span.seconds += elapsed - nested.pop()
+            if nested:
+                nested[-1] += elapsed
+
+    def stage(self, name: str, build: Callable[[Any], Any], rows: Any, **metadata: Any) -> Any:
+        profiler = self.profiler
+        parent = profiler._stack[-1] if profiler._stack else None
+        span = Span(self.stage_name, name, None, len(profiler._stack), parent, metadata)
+        span.seconds = 0.0
+        span.rows_out = 0
+        profiler.spans.append(span)
+
+        if isinstance(rows, MeteredRows):
+            self.stages.append((span, rows.span))
+        else:
+            self.stages.append((span, self.rows_in if rows is None else row_count(rows)))
+
+        result = self._timed(span, build, rows)
+        if isinstance(result, Mapping):
+            span.rows_out = len(result)
+            span.metadata['groups'] = len(result)
+            return result
+        return MeteredRows(result, span, self)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+
+        for span, upstream in self.stages:
+            span.rows_in = upstream.rows_out if isinstance(upstream, Span) else upstream
+            for hook in self.profiler.hooks:
+                hook(span)
+
+
+class _NullPipeline:
+    def stage(self, name: str, build: Callable[[Any], Any], rows: Any, **metadata: Any) -> Any:
+        return build(rows)
+
+    def close(self) -> None:
+        pass
+
+
+_NULL_PIPELINE = _NullPipeline()
+
+
+class Profiler:
+    def __init__(self, memory: bool = False, hooks: Iterable[Hook] = ()):
+        self.memory = memory
+        self.hooks: List[Hook] = list(hooks)
+        self.spans: List[Span] = list()
+        self._stack: List[int] = list()
+        self._token = None
+        self._started_tracing = False
+
+    def add_hook(self, hook: Hook) -> None:
+        self.hooks.append(hook)
+
+    def __enter__(self) -> 'Profiler':
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._token = _active_profiler.set(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        _active_profiler.reset(self._token)
+        self._token = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextmanager
+    def span(self, stage: str, name: str, rows_in: Optional[int] = None, **metadata: Any) -> Iterator[Span]:
+        parent = self._stack[-1] if self._stack else None
+        span = Span(stage, name, rows_in, len(self._stack), parent, metadata)
+        self._stack.append(len(self.spans))
+        self.spans.append(span)
+
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                self.spans[parent]._peak = max(self.spans[parent]._peak, peak)
+            tracemalloc.reset_peak()
+            span._memory_start = span._peak = current
+
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.seconds = time.perf_counter() - start
+            self._stack.pop()
+
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                span._peak = max(span._peak, peak)
+                span.allocated_bytes = current - span._memory_start
+                span.peak_bytes = span._peak - span._memory_start
+                if parent is not None:
+                    self.spans[parent]._peak = max(self.spans[parent]._peak, span._peak)
+
+            for hook in self.hooks:
+                hook(span)
+
+    def trace(self) -> List[Dict[str, Any]]:
+        return [span.to_dict() for span in self.spans]
+
+    def summary(self) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        summary: Dict[Tuple[str, str], Dict[str, Any]] = dict()
+        for span in self.spans:
+            entry = summary.setdefault((span.stage, span.name), {'calls': 0, 'seconds': 0.0, 'rows_in': 0, 'rows_out': 0})
+            entry['calls'] += 1
+            entry['seconds'] += span.seconds or 0.0
+            entry['rows_in'] += span.rows_in or 0
+            entry['rows_out'] += span.rows_out or 0
+        return summary
+
+    def report(self) -> str:
+        lines = list()
+        for span in self.spans:
+            rows = f"{span.rows_in if span.rows_in is not None else '?'} -> {span.rows_out if span.rows_out is not None else '?'}"
+            memory = f" {span.allocated_bytes:+} B (пик {span.peak_bytes} B)" if span.peak_bytes is not None else ''
+            lines.append(f"{'  ' * span.depth}{span.stage}.{span.name}: {(span.seconds or 0) * 1000:.3f} мс, строк {rows}{memory}")
+        return '\n'.join(lines)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+def current_profiler() -> Optional[Profiler]:
+    return _active_profiler.get()
+
+
+def stage(stage_name: str, name: str, rows_in: Optional[int] = None, **metadata: Any) -> Any:
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return nullcontext(Span(stage_name, name, rows_in))
+    return profiler.span(stage_name, name, rows_in, **metadata)
+
+
+def pipeline(stage_name: str, rows_in: Optional[int] = None) -> Any:
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return _NULL_PIPELINE
+    return Pipeline(profiler, stage_name, rows_in)
+
+
+def row_count(value: Any) -> Optional[int]:
+    if isinstance(value, Sized) and not isinstance(value, (str, bytes, Mapping)):
+        return len(value)
+    return None
+
+
+def profiled(stage_name: str, name: Optional[str] = None,
+             rows_in: Optional[Callable[..., Optional[int]]] = None,
+             rows_out: Callable[[Any], Optional[int]] = row_count) -> Callable[[Callable], Callable]:
+    def decorator(func: Callable) -> Callable:
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            profiler = _active_profiler.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+
+            with profiler.span(stage_name, label, rows_in(*args, **kwargs) if rows_in is not None else None) as span:
+                result = func(*args, **kwargs)
+                span.rows_out = rows_out(result)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -1,23 +1,48 @@
-from typing import List, Dict, Any, Callable, Optional, Union
+from typing import List, Dict, Any, Callable, Optional, Union, Iterable, Iterator, Tuple, Sequence
 from difflib import get_close_matches
 from collections import defaultdict
 from functools import reduce
+from itertools import islice
+import heapq
 import operator
-import json
 from .csv_reader import CSVData, CSVRow
+from .predicates import Predicate, Eq, In, Range
+from .indexes import IndexSet
+from .query_planner import ColumnStatistics, QueryPlanner, QueryPlan, _describe_condition
+from .query_cache import QueryResultCache
+from .aggregates import AggregatesSpec, normalize_spec
+from .grouping import aggregate_groups, grouping_key
+from .views import DataView
+from .sorting import DEFAULT_MEMORY_LIMIT, external_sort, sort_in_memory
+from .cancellation import CancellationToken
+from .profiling import _NULL_PIPELINE, pipeline, profiled, row_count
+
+
+def _result_rows(result: Any) -> Optional[int]:
+    if isinstance(result, dict):
+        return sum(len(group) for group in result.values())
+    return row_count(result)
 
 QueryData = Union[CSVData, Dict[Any, CSVData]]
 
 
 class DataQueryBuilder:
-    def __init__(self, data: CSVData, headers: List[str]):
+    def __init__(self, data: Iterable[CSVRow], headers: List[str], indexes: Optional[IndexSet] = None,
+                 prefix_cache: Optional[QueryResultCache] = None):
         self.original_data = data
         self.headers = headers
+        self.indexes = indexes
+        self.prefix_cache = prefix_cache
         self._operations: List[tuple] = []
         self.optimised = True
         self.result_data: Optional[QueryData] = None
+        self.statistics = ColumnStatistics(data)
+        self._plan: Optional[QueryPlan] = None
+        self.sort_memory_limit: Optional[int] = None
+        self.sort_temp_dir: Optional[str] = None
+        self.cancellation: Optional[CancellationToken] = None
 
-    def select(self, *fields: str) -> 'DataQueryBuilder':
+    def _validate_fields(self, *fields: str) -> None:
         invalid_fields = [field for field in fields if field not in self.headers]
         if invalid_fields:
             suggestions = [
@@ -26,21 +51,64 @@ class DataQueryBuilder:
             ]
             raise ValueError(f"Недопустимые поля: {invalid_fields}. Подсказки: {suggestions}")
 
+    def select(self, *fields: str) -> 'DataQueryBuilder':
+        self._validate_fields(*fields)
+
         self._operations.append(('select', fields))
         self.optimised = False
+        self.result_data = None
         return self
 
     def filter(self, condition: Callable[[Dict[str, Any]], bool]) -> 'DataQueryBuilder':
         self._operations.append(('filter', condition))
         self.optimised = False
+        self.result_data = None
         return self
 
+    def where(self, predicate: Predicate) -> 'DataQueryBuilder':
+        self._validate_fields(predicate.field)
+        return self.filter(predicate)
+
+    def filter_eq(self, field: str, value: Any) -> 'DataQueryBuilder':
+        return self.where(Eq(field, value))
+
+    def filter_in(self, field: str, values: Iterable[Any]) -> 'DataQueryBuilder':
+        return self.where(In(field, values))
+
+    def filter_range(self, field: str, low: Optional[Any] = None, high: Optional[Any] = None,
+                     include_low: bool = True, include_high: bool = True) -> 'DataQueryBuilder':
+        return self.where(Range(field, low, high, include_low, include_high))
+
     def sort_by(self, field: str, reverse: bool = False) -> 'DataQueryBuilder':
         if field not in self.headers:
             raise ValueError(f"Поле {field} отсутствует")
 
         self._operations.append(('sort', (field, reverse)))
         self.optimised = False
+        self.result_data = None
+        return self
+
+    def limit(self, count: int) -> 'DataQueryBuilder':
+        if count < 0:
+            raise ValueError(f"Лимит не может быть отрицательным, получено: {count}")
+
+        self._operations.append(('limit', count))
+        self.optimised = False
+        self.result_data = None
+        return self
+
+    def external_sort(self, memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                      temp_dir: Optional[str] = None) -> 'DataQueryBuilder':
+        if memory_limit <= 0:
+            raise ValueError(f"Бюджет памяти для сортировки должен быть положительным, получено: {memory_limit}")
+
+        self.sort_memory_limit = memory_limit
+        self.sort_temp_dir = temp_dir
+        self.result_data = None
+        return self
+
+    def with_cancellation(self, token: Optional[CancellationToken]) -> 'DataQueryBuilder':
+        self.cancellation = token
         return self
 
     def group_by(self, field: str) -> 'DataQueryBuilder':
@@ -49,66 +117,282 @@ class DataQueryBuilder:
 
         self._operations.append(('group', field))
         self.optimised = False
+        self.result_data = None
         return self
 
-    def _optimize_operations(self) -> List[tuple]:
-        if self.optimised:
-            return self._operations
+    def _current_indexes(self) -> Optional[IndexSet]:
+        if self.indexes is None or not hasattr(self.original_data, '__len__'):
+            return None
+        return self.indexes if self.indexes.covers(self.original_data) else None
 
-        order = {'filter': 0, 'sort': 1, 'select': 2, 'group': 3}
-        optimise_order = lambda op: order.get(op[0]) or -1
+    def _build_plan(self) -> QueryPlan:
+        if self.optimised and self._plan is not None:
+            if self._plan.access is None or self._current_indexes() is not None:
+                return self._plan
 
+        self._plan = QueryPlanner(self.statistics, self._current_indexes()).plan(self._operations)
         self.optimised = True
-        return sorted(self._operations, key=optimise_order)
+        return self._plan
+
+    def _optimize_operations(self) -> List[tuple]:
+        return self._build_plan().operations()
+
+    def explain(self) -> str:
+        return self._build_plan().explain()
 
     def _safe_grouping_key(self, item: Dict[str, Any], field: str) -> str:
         try:
             raw_value = item.get(field)
-            
-            if raw_value is None:
-                return "__NULL__"
-            elif isinstance(raw_value, (str, int, float, bool)):
-                return str(raw_value)
-            elif isinstance(raw_value, (list, tuple)):
-                return f"__LIST__{json.dumps(raw_value, sort_keys=True, default=str)}"
-            elif isinstance(raw_value, dict):
-                return f"__DICT__{json.dumps(raw_value, sort_keys=True, default=str)}"
-            else:
-                return str(raw_value)
-                
+            return grouping_key(raw_value)
         except Exception as e:
             raise ValueError(f"Ошибка при обработке ключа группировки в записи {item}: "
                            f"поле '{field}' = {raw_value}, ошибка: {e}") from e
-    
-    def execute(self) -> QueryData:
+
+    def _group_from_index(self, field: str, positions: Optional[List[int]],
+                          fields: Optional[Tuple[str, ...]]) -> Optional[Dict[str, CSVData]]:
+        indexes = self._current_indexes()
+        index = indexes.get_index(field, 'hash') if indexes is not None else None
+        if index is None or not index.groupable or (fields is not None and field not in fields):
+            return None
+
+        selected = set(positions) if positions is not None else None
+        buckets = [
+            (index.group_keys[value], bucket if selected is None else [p for p in bucket if p in selected])
+            for value, bucket in index.buckets.items()
+        ]
+        buckets = sorted((bucket for bucket in buckets if bucket[1]), key=lambda bucket: bucket[1][0])
+
+        source = self.original_data
+        if fields is None:
+            return {key: [source[p] for p in bucket] for key, bucket in buckets}
+        return {key: [{f: source[p].get(f) for f in fields} for p in bucket] for key, bucket in buckets}
+
+    def _guard(self, items: Iterable[Any]) -> Iterable[Any]:
+        if self.cancellation is None:
+            return items
+        return self.cancellation.guard(items)
+
+    def _scan(self, plan: QueryPlan) -> Tuple[Iterator[CSVRow], Optional[List[int]]]:
+        source = self.original_data
+        filters = plan.filters
+
+        if plan.access is not None:
+            positions = plan.access_positions
+            if filters:
+                positions = [p for p in self._guard(positions) if all(condition(source[p]) for condition in filters)]
+            return (source[p] for p in self._guard(positions)), positions
+
+        rows = self._guard(self._source_rows(plan))
+        if not filters:
+            return iter(rows), None
+        if len(filters) == 1:
+            return filter(filters[0], rows), None
+        return (item for item in rows if all(condition(item) for condition in filters)), None
+
+    def _source_rows(self, plan: QueryPlan) -> Iterable[CSVRow]:
+        return self.original_data
+
+    @staticmethod
+    def _sort_key(field: str) -> Callable[[CSVRow], tuple]:
+        return lambda x: (x.get(field) is None, x.get(field))
+
+    @staticmethod
+    def _select_fields(rows: Iterable[CSVRow], fields: Tuple[str, ...]) -> Iterator[CSVRow]:
+        return ({field: item.get(field) for field in fields} for item in rows)
+
+    def _project(self, rows: Iterable[CSVRow], selects: List[Tuple[str, ...]],
+                 stages: Any = _NULL_PIPELINE) -> Iterable[CSVRow]:
+        for fields in selects:
+            rows = stages.stage('select', lambda rows, fields=fields: self._select_fields(rows, fields), rows,
+                                operation=repr(fields))
+        return rows
+
+    def _composite_key(self, sorts: List[Tuple[str, bool]]) -> Callable[[CSVRow], tuple]:
+        keys = [self._sort_key(field) for field, _ in reversed(sorts)]
+        return lambda x: tuple(key(x) for key in keys)
+
+    def _top_k(self, rows: Iterable[CSVRow], plan: QueryPlan) -> CSVData:
+        pick = heapq.nlargest if plan.sorts[0][1] else heapq.nsmallest
+        return pick(plan.limit, rows, key=self._composite_key(plan.sorts))
+
+    def _sorted(self, rows: Iterable[CSVRow], sorts: List[Tuple[str, bool]]) -> Iterable[CSVRow]:
+        if self.sort_memory_limit is not None:
+            return external_sort(rows, sorts, self.sort_memory_limit, self.sort_temp_dir, self.cancellation)
+        return sort_in_memory(rows, sorts, self.cancellation)
+
+    def _prefix_key(self, plan: QueryPlan) -> Optional[tuple]:
+        if self.prefix_cache is None or self.sort_memory_limit is not None or not hasattr(self.original_data, '__len__'):
+            return None
+
+        conditions = ([plan.access] if plan.access is not None else []) + plan.filters
+        if not conditions or not all(isinstance(condition, Predicate) for condition in conditions):
+            return None
+
+        return 'prefix', len(self.original_data), frozenset(condition.canonical() for condition in conditions)
+
+    @staticmethod
+    def _scan_metadata(plan: QueryPlan) -> Dict[str, Any]:
+        metadata: Dict[str, Any] = {'filters': [_describe_condition(condition) for condition in plan.filters]}
+        if plan.access is not None:
+            metadata['access'] = _describe_condition(plan.access)
+        return metadata
+
+    def _memoized_rows(self, plan: QueryPlan, prefix: tuple, stages: Any = _NULL_PIPELINE) -> Iterable[CSVRow]:
+        cache, token = self.prefix_cache, self.original_data
+        sorts = tuple(plan.sorts)
+        rows = cache.get(prefix + (sorts,), token) if sorts else None
+
+        if rows is None:
+            filtered = cache.get(prefix + ((),), token)
+            if filtered is None:
+                scanned = stages.stage('scan', lambda _: self._scan(plan)[0], None, **self._scan_metadata(plan))
+                filtered = list(scanned)
+                cache.put(prefix + ((),), filtered, token)
+
+            if plan.top_k:
+                rows = stages.stage('top_k', lambda rows: self._top_k(rows, plan), filtered,
+                                    operation=repr((sorts, plan.limit)))
+                return self._project(rows, plan.selects, stages)
+
+            rows = filtered
+            if sorts:
+                rows = stages.stage('sort', lambda rows: self._sorted(rows, plan.sorts), filtered, operation=repr(sorts))
+                rows = rows if isinstance(rows, list) else list(rows)
+                cache.put(prefix + (sorts,), rows, token)
+
+        if plan.limit is not None:
+            rows = stages.stage('limit', lambda rows: rows[:plan.limit], rows, operation=repr(plan.limit))
+        return self._project(iter(rows), plan.selects, stages)
+
+    def _rows(self, plan: QueryPlan, stages: Any = _NULL_PIPELINE) -> Tuple[Iterable[CSVRow], Optional[List[int]]]:
+        prefix = self._prefix_key(plan)
+        if prefix is not None:
+            return self._memoized_rows(plan, prefix, stages), None
+
+        scanned = list()
+
+        def scan(_: Any) -> Iterator[CSVRow]:
+            rows, positions = self._scan(plan)
+            scanned.append(positions)
+            return rows
+
+        rows = stages.stage('scan', scan, None, **self._scan_metadata(plan))
+        positions = scanned[0]
+
+        if plan.select_before_sort:
+            rows = self._project(rows, plan.selects, stages)
+
+        if plan.top_k:
+            rows = stages.stage('top_k', lambda rows: self._top_k(rows, plan), rows,
+                                operation=repr((tuple(plan.sorts), plan.limit)))
+        elif plan.sorts:
+            rows = stages.stage('sort', lambda rows: self._sorted(rows, plan.sorts), rows, operation=repr(plan.sorts))
+        if plan.limit is not None and not plan.top_k:
+            rows = stages.stage('limit', lambda rows: islice(rows, plan.limit), rows, operation=repr(plan.limit))
+
+        if not plan.select_before_sort:
+            rows = self._project(rows, plan.selects, stages)
+
+        return rows, positions
+
+    def _stages(self) -> Any:
+        return pipeline('query', row_count(self.original_data))
+
+    @staticmethod
+    def _closing(rows: Iterable[CSVRow], stages: Any) -> Iterator[CSVRow]:
+        try:
+            yield from rows
+        finally:
+            stages.close()
+
+    def stream(self) -> Iterator[CSVRow]:
+        plan = self._build_plan()
+        if plan.group is not None:
+            raise ValueError("Результат с группировкой нельзя получить потоком, используйте execute()")
+
+        stages = self._stages()
+        rows, _ = self._rows(plan, stages)
+        if stages is _NULL_PIPELINE:
+            return iter(rows)
+        return self._closing(rows, stages)
+
+    def _order_groups(self, groups: Dict[str, CSVData], order: Tuple[str, bool]) -> Dict[str, CSVData]:
+        field, reverse = order
+        key = self._sort_key(field)
+        return dict(sorted(groups.items(), key=lambda group: key(group[1][0]), reverse=reverse))
+
+    @profiled('query', rows_out=_result_rows)
+    def execute(self, copy: bool = False) -> QueryData:
         if not self._operations:
-            self.result_data = self.original_data.copy()
+            if copy or not isinstance(self.original_data, Sequence):
+                self.result_data = list(self.original_data)
+            else:
+                self.result_data = DataView(self.original_data)
             return self.result_data
 
-        data = self.original_data.copy()
-        grouped_result = None
-
-        for operation_type, operation_data in self._optimize_operations():
-            if operation_type == 'filter':
-                data = [item for item in data if operation_data(item)]
-            elif operation_type == 'sort':
-                field, reverse = operation_data
-                data = sorted(data, key=lambda x: (x.get(field) is None, x.get(field)), reverse=reverse)
-            elif operation_type == 'select':
-                data = [{field: item.get(field) for field in operation_data} for item in data]
-            elif operation_type == 'group':
-                grouped = defaultdict(list)
-                for item in data:
-                    key = self._safe_grouping_key(item, operation_data)
-                    grouped[key].append(item)
-                grouped_result = dict(grouped)
-
-        self.result_data = grouped_result if grouped_result is not None else data
+        plan = self._build_plan()
+        stages = self._stages()
+        try:
+            rows, positions = self._rows(plan, stages)
+
+            if plan.group is None:
+                self.result_data = rows if isinstance(rows, list) else list(rows)
+                return self.result_data
+
+            grouped_result = stages.stage('group', lambda rows: self._group_rows(rows, positions, plan), rows,
+                                          operation=repr(plan.group))
+            if plan.group_order is not None:
+                grouped_result = stages.stage('group_sort', lambda groups: self._order_groups(groups, plan.group_order),
+                                              grouped_result, operation=repr(plan.group_order))
+        finally:
+            stages.close()
+
+        self.result_data = grouped_result
         return self.result_data
 
+    def _group_rows(self, rows: Iterable[CSVRow], positions: Optional[List[int]], plan: QueryPlan) -> Dict[str, CSVData]:
+        reusable = positions is not None or (not plan.filters and plan.access is None)
+        if not plan.sorts and plan.limit is None and len(plan.selects) <= 1 and reusable:
+            selected_fields = plan.selects[0] if plan.selects else None
+            grouped_result = self._group_from_index(plan.group, positions, selected_fields)
+            if grouped_result is not None:
+                return grouped_result
+
+        grouped = defaultdict(list)
+        for item in self._guard(rows):
+            key = self._safe_grouping_key(item, plan.group)
+            grouped[key].append(item)
+        return dict(grouped)
+
+    @profiled('query', rows_out=len)
+    def agg(self, spec: AggregatesSpec, workers: Optional[int] = None) -> Dict[Any, Dict[str, CSVRow]]:
+        plan = self._build_plan()
+        if plan.group is None:
+            raise ValueError("Агрегация по группам требует group_by()")
+
+        self._validate_fields(*normalize_spec(spec))
+        stages = self._stages()
+        try:
+            rows, _ = self._rows(plan, stages)
+            rows = rows if isinstance(rows, list) else list(rows)
+            groups = stages.stage('aggregate', lambda rows: aggregate_groups(rows, plan.group, spec, workers, self.cancellation), rows,
+                                  operation=repr(plan.group))
+        finally:
+            stages.close()
+
+        if plan.group_order is not None:
+            field, reverse = plan.group_order
+            key = self._sort_key(field)
+            groups = dict(sorted(groups.items(), key=lambda group: key(rows[group[1][0]]), reverse=reverse))
+
+        return {group_key: results for group_key, (_, results) in groups.items()}
+
     def count(self) -> int:
         if self.result_data is None:
-            self.execute()
+            plan = self._build_plan()
+            rows, positions = self._scan(plan)
+            total = len(positions) if positions is not None else sum(1 for _ in rows)
+            return total if plan.limit is None else min(total, plan.limit)
 
         if isinstance(self.result_data, dict):
             return sum(len(group) for group in self.result_data.values())
@@ -116,6 +400,25 @@ class DataQueryBuilder:
 
     def first(self) -> Optional[CSVRow]:
         if self.result_data is None:
+            plan = self._build_plan()
+            sorts = plan.first_sorts()
+
+            if plan.limit == 0:
+                return None
+
+            if len(sorts) <= 1:
+                rows, _ = self._scan(plan)
+                if sorts:
+                    field, reverse = sorts[0]
+                    pick = max if reverse else min
+                    item = pick(rows, key=self._sort_key(field), default=None)
+                else:
+                    item = next(rows, None)
+
+                if item is None:
+                    return None
+                return next(iter(self._project([item], plan.selects)))
+
             self.execute()
 
         if isinstance(self.result_data, dict):
@@ -133,3 +436,4 @@ class DataQueryBuilder:
     def set_operations(self, operations: List[tuple]) -> None:
         self._operations = operations.copy()
         self.optimised = False
+        self.result_data = None
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Hashable, Tuple, Callable, Iterable
+from .csv_reader import CSVRow
+from .views import DataView
+
+QueryData = Any
+
+
+def result_size(result: QueryData) -> int:
+    if isinstance(result, dict):
+        return sum(len(group) for group in result.values())
+    return len(result)
+
+
+def copy_rows(rows: Iterable[CSVRow]) -> List[CSVRow]:
+    return [dict(row) for row in rows]
+
+
+def copy_result(result: QueryData) -> QueryData:
+    if isinstance(result, Mapping):
+        return {key: copy_rows(group) for key, group in result.items()}
+    return copy_rows(result)
+
+
+def view_result(result: QueryData) -> QueryData:
+    if isinstance(result, dict):
+        return MappingProxyType({key: DataView(group) for key, group in result.items()})
+    return DataView(result)
+
+
+class QueryResultCache:
+    def __init__(self, max_entries: int = 128, max_rows: Optional[int] = None):
+        if max_entries <= 0:
+            raise ValueError(f"Размер кэша должен быть положительным, получено: {max_entries}")
+
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._rows = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, QueryData, int]]' = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key: Hashable, token: Any = None) -> Optional[QueryData]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] is not token:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, result: QueryData, token: Any = None) -> None:
+        size = result_size(result)
+        if self.max_rows is not None and size > self.max_rows:
+            return
+
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (token, result, size)
+            self._rows += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_rows is not None and self._rows > self.max_rows
+            ):
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def _discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._rows -= entry[2]
+
+    def invalidate(self, matches: Callable[[Hashable], bool]) -> int:
+        with self._lock:
+            stale = [key for key in self._entries if matches(key)]
+            for key in stale:
+                self._discard(key)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'rows': self._rows,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
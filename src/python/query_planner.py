@@ -0,0 +1,227 @@
+from typing import List, Dict, Any, Callable, Optional, Tuple, Iterable
+from .csv_reader import CSVData, CSVRow
+from .predicates import Predicate
+from .indexes import IndexSet
+
+DEFAULT_SELECTIVITY = 0.5
+INDEX_SCAN_THRESHOLD = 0.25
+
+SortSpec = Tuple[str, bool]
+
+
+class ColumnStatistics:
+    def __init__(self, data: Iterable[CSVRow], sample_size: int = 1000):
+        self.data = data
+        self.sample_size = sample_size
+        self._sample: Optional[CSVData] = None
+        self._columns: Dict[str, List[Any]] = dict()
+
+    @property
+    def row_count(self) -> Optional[int]:
+        return len(self.data) if hasattr(self.data, '__len__') else None
+
+    def sample(self) -> CSVData:
+        if self._sample is None:
+            row_count = self.row_count
+            if row_count is None or not hasattr(self.data, '__getitem__'):
+                self._sample = list()
+            else:
+                size = min(row_count, self.sample_size)
+                self._sample = [self.data[i * row_count // size] for i in range(size)]
+        return self._sample
+
+    def column(self, field: str) -> List[Any]:
+        if field not in self._columns:
+            self._columns[field] = [row.get(field) for row in self.sample()]
+        return self._columns[field]
+
+    def selectivity(self, condition: Callable[[CSVRow], bool]) -> Optional[float]:
+        if not isinstance(condition, Predicate):
+            return None
+
+        values = self.column(condition.field)
+        if not values:
+            return None
+
+        matched = sum(1 for value in values if condition.matches(value))
+        return max(matched, 0.5) / len(values)
+
+
+def _describe_condition(condition: Callable[[CSVRow], bool]) -> str:
+    if isinstance(condition, Predicate):
+        return repr(condition)
+    return getattr(condition, '__name__', type(condition).__name__)
+
+
+def _describe_sort(field: str, reverse: bool) -> str:
+    return f"{field} {'desc' if reverse else 'asc'}"
+
+
+class QueryPlan:
+    def __init__(self):
+        self.access: Optional[Predicate] = None
+        self.access_positions: Optional[List[int]] = None
+        self.filters: List[Callable[[CSVRow], bool]] = list()
+        self.sorts: List[SortSpec] = list()
+        self.limit: Optional[int] = None
+        self.top_k = False
+        self.selects: List[Tuple[str, ...]] = list()
+        self.select_before_sort = False
+        self.group: Optional[str] = None
+        self.group_order: Optional[SortSpec] = None
+        self.notes: List[str] = list()
+        self.estimates: Dict[str, Optional[float]] = dict()
+
+    def first_sorts(self) -> List[SortSpec]:
+        return self.sorts + ([self.group_order] if self.group_order else [])
+
+    def operations(self) -> List[tuple]:
+        operations: List[tuple] = list()
+        if self.access is not None:
+            operations.append(('index_scan', self.access))
+        operations.extend(('filter', condition) for condition in self.filters)
+
+        selects = [('select', fields) for fields in self.selects]
+        if self.select_before_sort:
+            operations.extend(selects)
+
+        if self.top_k:
+            operations.append(('top_k', (tuple(self.sorts), self.limit)))
+        else:
+            operations.extend(('sort', sort) for sort in self.sorts)
+            if self.limit is not None:
+                operations.append(('limit', self.limit))
+
+        if not self.select_before_sort:
+            operations.extend(selects)
+
+        if self.group is not None:
+            operations.append(('group', self.group))
+        if self.group_order is not None:
+            operations.append(('group_sort', self.group_order))
+        return operations
+
+    def explain(self) -> str:
+        rows = self.estimates.get('rows')
+        lines = list()
+
+        if self.access is not None:
+            estimate = self.estimates.get(repr(self.access))
+            lines.append(f"IndexScan {self.access!r} ~{_fraction(rows, estimate)} строк")
+        else:
+            lines.append(f"Scan ~{rows if rows is not None else '?'} строк")
+
+        for condition in self.filters:
+            estimate = self.estimates.get(repr(condition)) if isinstance(condition, Predicate) else None
+            selectivity = f"{estimate:.3f}" if estimate is not None else '?'
+            lines.append(f"Filter {_describe_condition(condition)} (селективность {selectivity})")
+
+        selects = [f"Select {', '.join(fields)}" for fields in self.selects]
+        if self.select_before_sort:
+            lines.extend(selects)
+
+        if self.top_k:
+            keys = ', '.join(_describe_sort(*sort) for sort in reversed(self.sorts))
+            lines.append(f"TopK {self.limit} by {keys}")
+        else:
+            lines.extend(f"Sort {_describe_sort(*sort)}" for sort in self.sorts)
+            if self.limit is not None:
+                lines.append(f"Limit {self.limit}")
+
+        if not self.select_before_sort:
+            lines.extend(selects)
+
+        if self.group is not None:
+            lines.append(f"Group {self.group}")
+        if self.group_order is not None:
+            lines.append(f"Order groups by {_describe_sort(*self.group_order)}")
+
+        lines.append(f"Ожидаемое число строк: ~{self.estimates.get('output', '?')}")
+        lines.extend(f"-- {note}" for note in self.notes)
+        return '\n'.join(lines)
+
+
+def _fraction(rows: Optional[int], selectivity: Optional[float]) -> Any:
+    if rows is None or selectivity is None:
+        return '?'
+    return round(rows * selectivity)
+
+
+class QueryPlanner:
+    def __init__(self, statistics: ColumnStatistics, indexes: Optional[IndexSet] = None):
+        self.statistics = statistics
+        self.indexes = indexes
+
+    def plan(self, operations: List[tuple]) -> QueryPlan:
+        plan = QueryPlan()
+        stages: Dict[str, list] = {'filter': [], 'sort': [], 'limit': [], 'select': [], 'group': []}
+        for operation_type, operation_data in operations:
+            stages[operation_type].append(operation_data)
+
+        plan.estimates['rows'] = self.statistics.row_count
+        self._plan_filters(plan, stages['filter'])
+        plan.selects = list(stages['select'])
+        plan.limit = min(stages['limit']) if stages['limit'] else None
+        plan.group = stages['group'][-1] if stages['group'] else None
+        self._plan_sorts(plan, stages['sort'])
+
+        output = plan.estimates.get('filtered')
+        if output is not None and plan.limit is not None:
+            output = min(output, plan.limit)
+        plan.estimates['output'] = output if output is not None else '?'
+        return plan
+
+    def _plan_filters(self, plan: QueryPlan, filters: List[Callable[[CSVRow], bool]]) -> None:
+        estimated = [(condition, self.statistics.selectivity(condition)) for condition in filters]
+        for condition, selectivity in estimated:
+            if selectivity is not None:
+                plan.estimates[repr(condition)] = selectivity
+
+        predicates = sorted(
+            (item for item in estimated if item[1] is not None),
+            key=lambda item: item[1]
+        )
+        opaque = [condition for condition, selectivity in estimated if selectivity is None]
+        if opaque and predicates:
+            plan.notes.append("декларативные фильтры вынесены перед пользовательскими, порядок последних сохранён")
+
+        rows = plan.estimates['rows']
+        if self.indexes is not None and rows:
+            for condition, _ in predicates:
+                positions = self.indexes.lookup(condition)
+                if positions is None:
+                    continue
+                plan.estimates[repr(condition)] = len(positions) / rows
+                if len(positions) / rows <= INDEX_SCAN_THRESHOLD:
+                    plan.access, plan.access_positions = condition, positions
+                break
+
+        plan.filters = [condition for condition, _ in predicates if condition is not plan.access] + opaque
+
+        if rows is not None:
+            remaining = float(rows)
+            for _, selectivity in estimated:
+                remaining *= selectivity if selectivity is not None else DEFAULT_SELECTIVITY
+            plan.estimates['filtered'] = round(remaining) if filters else rows
+
+    def _plan_sorts(self, plan: QueryPlan, sorts: List[SortSpec]) -> None:
+        effective = [sort for i, sort in enumerate(sorts) if all(sort[0] != later[0] for later in sorts[i + 1:])]
+        if len(effective) < len(sorts):
+            plan.notes.append("убраны сортировки, перекрытые более поздней сортировкой по тому же полю")
+
+        group_visible = plan.group is not None and (
+            not plan.selects or (len(plan.selects) == 1 and plan.group in plan.selects[0])
+        )
+        if effective and plan.limit is None and group_visible and effective[-1][0] == plan.group:
+            plan.group_order = effective.pop()
+            plan.notes.append("сортировка по полю группировки заменена сортировкой групп")
+
+        plan.sorts = effective
+
+        if plan.sorts and plan.limit is not None and len({reverse for _, reverse in plan.sorts}) == 1:
+            plan.top_k = True
+            plan.notes.append("сортировка с лимитом заменена на отбор top-k")
+
+        if plan.sorts and plan.limit is None and len(plan.selects) == 1:
+            if all(field in plan.selects[0] for field, _ in plan.sorts):
+                plan.select_before_sort = True
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, CancelledError, InvalidStateError
+from typing import List, Dict, Any, Optional, Hashable, Iterable, Tuple
+from .user import User
+from .query_cache import copy_result
+from .cancellation import CancellationToken
+
+QueryRequest = Tuple[User, str]
+
+
+class _SharedQuery:
+    def __init__(self, key: Optional[Hashable], token: CancellationToken):
+        self.key = key
+        self.token = token
+        self.future: Optional[Future] = None
+        self.waiters = 0
+
+
+class QueryService:
+    def __init__(self, max_workers: Optional[int] = None, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='query-service')
+        self._in_flight: Dict[Hashable, _SharedQuery] = dict()
+        self._lock = threading.RLock()
+        self.submitted = 0
+        self.executed = 0
+        self.shared = 0
+        self.cancelled = 0
+
+    def __enter__(self) -> 'QueryService':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+
+    @staticmethod
+    def _request_key(user: User, query_name: str) -> Optional[Hashable]:
+        data = user.data
+        key = (id(data), len(data) if hasattr(data, '__len__') else None, tuple(user.saved_queries[query_name]))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _run(self, shared: _SharedQuery, user: User, query_name: str) -> Any:
+        shared.token.raise_if_cancelled()
+        with self._lock:
+            self.executed += 1
+        return user.execute_saved_query(query_name, copy=False, cancellation=shared.token)
+
+    def _finished(self, shared: _SharedQuery, future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(shared.key) is shared:
+                del self._in_flight[shared.key]
+
+    def _release(self, shared: _SharedQuery, caller: Future) -> None:
+        if not caller.cancelled():
+            return
+
+        with self._lock:
+            self.cancelled += 1
+            shared.waiters -= 1
+            if shared.waiters > 0:
+                return
+            if self._in_flight.get(shared.key) is shared:
+                del self._in_flight[shared.key]
+
+        shared.token.cancel()
+        shared.future.cancel()
+
+    @staticmethod
+    def _deliver(caller: Future, copy: bool, future: Future) -> None:
+        try:
+            if future.cancelled():
+                caller.set_exception(CancelledError("Запрос отменён"))
+            elif future.exception() is not None:
+                caller.set_exception(future.exception())
+            else:
+                result = future.result()
+                caller.set_result(copy_result(result) if copy else result)
+        except InvalidStateError:
+            pass
+
+    def submit(self, user: User, query_name: str, timeout: Optional[float] = None, copy: bool = True) -> Future:
+        if query_name not in user.saved_queries:
+            raise KeyError(f"Сохраненный запрос '{query_name}' не найден")
+
+        timeout = self.timeout if timeout is None else timeout
+        key = self._request_key(user, query_name)
+
+        with self._lock:
+            self.submitted += 1
+            shared = self._in_flight.get(key) if key is not None else None
+            if shared is None:
+                shared = _SharedQuery(key, CancellationToken(timeout))
+                shared.future = self._executor.submit(self._run, shared, user, query_name)
+                if key is not None:
+                    self._in_flight[key] = shared
+                    shared.future.add_done_callback(lambda future: self._finished(shared, future))
+            else:
+                self.shared += 1
+                deadline = CancellationToken(timeout).deadline
+                if deadline is None or shared.token.deadline is None:
+                    shared.token.deadline = None
+                else:
+                    shared.token.deadline = max(shared.token.deadline, deadline)
+            shared.waiters += 1
+
+        caller: Future = Future()
+        caller.add_done_callback(lambda future: self._release(shared, future))
+        shared.future.add_done_callback(lambda future: self._deliver(caller, copy, future))
+        return caller
+
+    def execute(self, user: User, query_name: str, timeout: Optional[float] = None, copy: bool = True) -> Any:
+        timeout = self.timeout if timeout is None else timeout
+        caller = self.submit(user, query_name, timeout, copy)
+        try:
+            return caller.result(timeout)
+        except TimeoutError:
+            caller.cancel()
+            raise
+
+    def execute_many(self, requests: Iterable[QueryRequest], timeout: Optional[float] = None,
+                     copy: bool = True) -> List[Any]:
+        callers = [self.submit(user, query_name, timeout, copy) for user, query_name in requests]
+        try:
+            return [caller.result(timeout) for caller in callers]
+        except BaseException:
+            for caller in callers:
+                caller.cancel()
+            raise
+
+    async def execute_async(self, user: User, query_name: str, timeout: Optional[float] = None,
+                            copy: bool = True) -> Any:
+        timeout = self.timeout if timeout is None else timeout
+        caller = self.submit(user, query_name, timeout, copy)
+        return await asyncio.wait_for(asyncio.wrap_future(caller), timeout)
+
+    async def execute_many_async(self, requests: Iterable[QueryRequest], timeout: Optional[float] = None,
+                                 copy: bool = True) -> List[Any]:
+        return await asyncio.gather(*(
+            self.execute_async(user, query_name, timeout, copy) for user, query_name in requests
+        ))
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'executed': self.executed,
+                'shared': self.shared,
+                'cancelled': self.cancelled,
+                'in_flight': len(self._in_flight),
+            }
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False) -> None:
+        if cancel_pending:
+            with self._lock:
+                pending = list(self._in_flight.values())
+            for shared in pending:
+                shared.token.cancel()
+        self._executor.shutdown(wait, cancel_futures=cancel_pending)
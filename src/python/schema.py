@@ -0,0 +1,74 @@
+from typing import Dict, Any, List, Optional, Iterable, Union, Type
+
+ColumnType = Type[Any]
+Schema = Dict[str, ColumnType]
+SchemaSpec = Dict[str, Union[str, ColumnType]]
+
+SCHEMA_TYPES: Dict[str, ColumnType] = {'int': int, 'float': float, 'str': str}
+NUMERIC_TYPES = (int, float)
+
+
+def type_name(column_type: ColumnType) -> str:
+    return column_type.__name__
+
+
+def normalize_schema(schema: Optional[SchemaSpec]) -> Schema:
+    normalized: Schema = dict()
+
+    for field, column_type in (schema or dict()).items():
+        if isinstance(column_type, str):
+            column_type = SCHEMA_TYPES.get(column_type, column_type)
+
+        if column_type not in SCHEMA_TYPES.values():
+            raise ValueError(
+                f"Неизвестный тип столбца '{field}': {column_type}. Доступные: {list(SCHEMA_TYPES)}"
+            )
+
+        normalized[field] = column_type
+
+    return normalized
+
+
+def _parses(column_type: ColumnType, value: str) -> bool:
+    try:
+        column_type(value)
+    except ValueError:
+        return False
+    return True
+
+
+def infer_column_type(values: Iterable[str]) -> Optional[ColumnType]:
+    candidates: List[ColumnType] = [int, float]
+    seen = False
+
+    for value in values:
+        if not value:
+            continue
+
+        seen = True
+        while candidates and not _parses(candidates[0], value):
+            candidates.pop(0)
+        if not candidates:
+            return str
+
+    return candidates[0] if seen else None
+
+
+def infer_schema(headers: List[str], rows: Iterable[List[str]]) -> Schema:
+    columns: List[List[str]] = [list() for _ in headers]
+
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value.strip())
+
+    schema: Schema = dict()
+    for header, column in zip(headers, columns):
+        column_type = infer_column_type(column)
+        if column_type is not None:
+            schema[header] = column_type
+
+    return schema
+
+
+def numeric_fields(schema: Schema) -> List[str]:
+    return [field for field, column_type in schema.items() if column_type in NUMERIC_TYPES]
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import List, Dict, Any, Optional, Tuple, Union
+from .csv_reader import CSVReader
+from .columnar import (
+    ColumnarTable, Column, NumericColumn, IntColumn, FloatColumn, DictionaryColumn, ObjectColumn,
+)
+
+SNAPSHOT_MAGIC = b'CSVSNAP1'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_ALIGNMENT = 8
+HASH_BLOCK_SIZE = 1 << 20
+
+_HEADER_LENGTH = struct.Struct('<Q')
+_NUMERIC_COLUMNS = {column.kind: column for column in (IntColumn, FloatColumn)}
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path: str, with_hash: bool = True) -> Dict[str, Any]:
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        fingerprint['hash'] = file_hash(path)
+    return fingerprint
+
+
+def default_snapshot_path(source_path: str) -> str:
+    return source_path + '.snapshot'
+
+
+class _LazyStrings:
+    def __init__(self, offsets: Any, blob: Any):
+        self.offsets = offsets
+        self.blob = blob
+        self._values: List[Optional[str]] = [None] * (len(offsets) - 1)
+
+    def __getitem__(self, code: int) -> str:
+        value = self._values[code]
+        if value is None:
+            raw = self.blob[self.offsets[code]:self.offsets[code + 1]]
+            value = self._values[code] = str(raw, 'utf-8', 'surrogatepass')
+        return value
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self):
+        return (self[code] for code in range(len(self)))
+
+
+def _column_buffers(column: Column) -> Tuple[Dict[str, Any], List[bytes]]:
+    meta = {'kind': column.kind, 'length': len(column), 'null_count': column.null_count}
+
+    if isinstance(column, NumericColumn):
+        return meta, [column.values.tobytes(), bytes(column.validity.bits)]
+
+    if isinstance(column, DictionaryColumn):
+        encoded = [value.encode('utf-8', 'surrogatepass') for value in column.dictionary]
+        offsets = array('q', [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        return meta, [column.codes.tobytes(), offsets.tobytes(), b''.join(encoded)]
+
+    if isinstance(column, ObjectColumn):
+        try:
+            payload = json.dumps(column.values, ensure_ascii=False).encode('utf-8', 'surrogatepass')
+        except TypeError as e:
+            raise ValueError(f"Столбец содержит значения, которые нельзя сохранить в снимок: {e}") from e
+        return meta, [payload]
+
+    return meta, []
+
+
+def _padding(size: int) -> bytes:
+    return b'\0' * (-size % SNAPSHOT_ALIGNMENT)
+
+
+def save_snapshot(data: Union[CSVReader, ColumnarTable], snapshot_path: Optional[str] = None,
+                  source_path: Optional[str] = None, options: Optional[Dict[str, Any]] = None,
+                  fingerprint: Optional[Dict[str, Any]] = None) -> str:
+    if isinstance(data, CSVReader):
+        source_path = source_path or data.filepath
+        table = ColumnarTable.from_reader(data)
+    else:
+        table = data
+
+    if not source_path:
+        raise ValueError("Для снимка необходимо указать исходный CSV-файл.")
+
+    snapshot_path = snapshot_path or default_snapshot_path(source_path)
+    columns: List[Dict[str, Any]] = list()
+    buffers: List[bytes] = list()
+    offset = 0
+
+    for column in table.columns:
+        meta, column_buffers = _column_buffers(column)
+        meta['buffers'] = list()
+        for buffer in column_buffers:
+            meta['buffers'].append([offset, len(buffer)])
+            buffers.extend((buffer, _padding(len(buffer))))
+            offset += len(buffer) + len(_padding(len(buffer)))
+        columns.append(meta)
+
+    header = json.dumps({
+        'version': SNAPSHOT_VERSION,
+        'byteorder': sys.byteorder,
+        'source': fingerprint or source_fingerprint(source_path),
+        'options': options or dict(),
+        'headers': table.headers,
+        'length': len(table),
+        'columns': columns,
+    }, ensure_ascii=False).encode('utf-8')
+    header += _padding(len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size + len(header)).replace(b'\0', b' ')
+
+    temporary_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(_HEADER_LENGTH.pack(len(header)))
+            f.write(header)
+            for buffer in buffers:
+                f.write(buffer)
+        os.replace(temporary_path, snapshot_path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+    return snapshot_path
+
+
+def _read_header(view: memoryview) -> Tuple[Dict[str, Any], int]:
+    prefix = len(SNAPSHOT_MAGIC) + _HEADER_LENGTH.size
+    if len(view) < prefix or bytes(view[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+        raise ValueError("Файл не является снимком CSV.")
+
+    header_length, = _HEADER_LENGTH.unpack(view[len(SNAPSHOT_MAGIC):prefix])
+    header = json.loads(str(view[prefix:prefix + header_length], 'utf-8'))
+    return header, prefix + header_length
+
+
+def _load_column(meta: Dict[str, Any], view: memoryview, start: int) -> Column:
+    buffers = [view[start + offset:start + offset + size] for offset, size in meta['buffers']]
+    kind, length, null_count = meta['kind'], meta['length'], meta['null_count']
+
+    if kind in _NUMERIC_COLUMNS:
+        column_type = _NUMERIC_COLUMNS[kind]
+        return column_type.from_buffers(buffers[0].cast(column_type.typecode), buffers[1], length, null_count)
+
+    if kind == DictionaryColumn.kind:
+        codes, offsets, blob = buffers
+        return DictionaryColumn.from_buffers(codes.cast('i'), _LazyStrings(offsets.cast('q'), blob), length, null_count)
+
+    if kind == ObjectColumn.kind:
+        return ObjectColumn(json.loads(str(buffers[0], 'utf-8', 'surrogatepass')))
+
+    return Column(length)
+
+
+def is_snapshot_fresh(header: Dict[str, Any], source_path: str, check_hash: bool = False) -> bool:
+    source = header.get('source', dict())
+    try:
+        current = source_fingerprint(source_path, with_hash=False)
+    except OSError:
+        return False
+
+    if current['size'] != source.get('size'):
+        return False
+    if current['mtime_ns'] != source.get('mtime_ns') or check_hash:
+        return file_hash(source_path) == source.get('hash')
+    return True
+
+
+def load_snapshot(snapshot_path: str, source_path: Optional[str] = None, check_hash: bool = False,
+                  options: Optional[Dict[str, Any]] = None, use_mmap: bool = True) -> Optional[ColumnarTable]:
+    try:
+        with open(snapshot_path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap else f.read()
+        view = memoryview(buffer)
+        header, start = _read_header(view)
+    except (OSError, ValueError):
+        return None
+
+    if header.get('version') != SNAPSHOT_VERSION or header.get('byteorder') != sys.byteorder:
+        return None
+    if options is not None and header.get('options') != options:
+        return None
+    if source_path is not None and not is_snapshot_fresh(header, source_path, check_hash):
+        return None
+
+    table = ColumnarTable(header['headers'], [_load_column(meta, view, start) for meta in header['columns']])
+    table.length = header['length']
+    table.read_only = True
+    return table
+
+
+def _reader_options(reader: CSVReader) -> Dict[str, Any]:
+    return {
+        'delimiter': reader.delimiter,
+        'schema': {field: column_type.__name__ for field, column_type in reader.declared_schema.items()},
+        'infer_schema': reader.infer_schema,
+        'schema_sample_size': reader.schema_sample_size if reader.infer_schema else None,
+    }
+
+
+def load_csv(filepath: str, snapshot_path: Optional[str] = None, reader: Optional[CSVReader] = None,
+             check_hash: bool = False, use_mmap: bool = True) -> ColumnarTable:
+    reader = reader if reader is not None else CSVReader()
+    snapshot_path = snapshot_path or default_snapshot_path(filepath)
+    options = _reader_options(reader)
+
+    table = load_snapshot(snapshot_path, filepath, check_hash, options, use_mmap)
+    if table is not None:
+        return table
+
+    fingerprint = source_fingerprint(filepath)
+    table = ColumnarTable.from_reader(reader.read(filepath))
+    try:
+        save_snapshot(table, snapshot_path, filepath, options, fingerprint)
+    except OSError:
+        pass
+
+    return table
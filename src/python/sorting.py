@@ -0,0 +1,146 @@
+import heapq
+import pickle
+import sys
+import tempfile
+from itertools import islice
+from operator import itemgetter
+from typing import List, Any, Optional, Callable, Iterable, Iterator, Tuple, BinaryIO
+from .csv_reader import CSVData, CSVRow
+from .cancellation import CancellationToken
+
+DEFAULT_MEMORY_LIMIT = 64 << 20
+SPILL_BATCH_ROWS = 1024
+MERGE_FAN_IN = 64
+SIZE_SAMPLE_ROWS = 256
+
+SortSpec = Tuple[str, bool]
+
+
+def sort_rows(rows: CSVData, field: str, reverse: bool = False) -> CSVData:
+    values = [row for row in rows if row.get(field) is not None]
+    empty = [row for row in rows if row.get(field) is None]
+    values.sort(key=itemgetter(field), reverse=reverse)
+    return empty + values if reverse else values + empty
+
+
+def sort_in_memory(rows: Iterable[CSVRow], sorts: List[SortSpec],
+                   cancellation: Optional[CancellationToken] = None) -> CSVData:
+    rows = list(rows)
+    for field, reverse in sorts:
+        if cancellation is not None:
+            cancellation.raise_if_cancelled()
+        rows = sort_rows(rows, field, reverse)
+    return rows
+
+
+class _Descending:
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+    def __lt__(self, other: '_Descending') -> bool:
+        return other.value < self.value
+
+
+def merge_key(sorts: List[SortSpec]) -> Callable[[CSVRow], tuple]:
+    fields = [(field, reverse) for field, reverse in reversed(sorts)]
+
+    def key(row: CSVRow) -> tuple:
+        parts = list()
+        for field, reverse in fields:
+            value = row.get(field)
+            part = (value is None, value)
+            parts.append(_Descending(part) if reverse else part)
+        return tuple(parts)
+
+    return key
+
+
+def _row_size(row: CSVRow) -> int:
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+
+
+def _run_rows(sample: CSVData, memory_limit: int) -> int:
+    if not sample:
+        return SPILL_BATCH_ROWS
+    row_size = sum(_row_size(row) for row in sample) / len(sample)
+    return max(int(memory_limit // row_size), SPILL_BATCH_ROWS)
+
+
+def _spill(rows: Iterable[CSVRow], temp_dir: Optional[str]) -> BinaryIO:
+    run = tempfile.TemporaryFile(dir=temp_dir)
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, SPILL_BATCH_ROWS))
+        if not batch:
+            break
+        pickle.dump([dict(row) for row in batch], run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run: BinaryIO) -> Iterator[CSVRow]:
+    try:
+        while True:
+            try:
+                batch = pickle.load(run)
+            except EOFError:
+                return
+            yield from batch
+    finally:
+        run.close()
+
+
+def _merge(runs: List[BinaryIO], key: Callable[[CSVRow], tuple],
+           cancellation: Optional[CancellationToken] = None) -> Iterator[CSVRow]:
+    merged = heapq.merge(*(_read_run(run) for run in runs), key=key)
+    if cancellation is None:
+        return merged
+    return cancellation.guard(merged)
+
+
+def external_sort(rows: Iterable[CSVRow], sorts: List[SortSpec], memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                  temp_dir: Optional[str] = None,
+                  cancellation: Optional[CancellationToken] = None) -> Iterator[CSVRow]:
+    if memory_limit <= 0:
+        raise ValueError(f"Бюджет памяти для сортировки должен быть положительным, получено: {memory_limit}")
+
+    iterator = iter(rows)
+    sample = list(islice(iterator, SIZE_SAMPLE_ROWS))
+    run_rows = _run_rows(sample, memory_limit)
+
+    chunk = sample + list(islice(iterator, run_rows - len(sample)))
+    if len(chunk) < run_rows:
+        return iter(sort_in_memory(chunk, sorts, cancellation))
+
+    levels: List[List[BinaryIO]] = [list()]
+    key = merge_key(sorts)
+    try:
+        while chunk:
+            levels[0].append(_spill(sort_in_memory(chunk, sorts, cancellation), temp_dir))
+            chunk = list(islice(iterator, run_rows))
+
+            for level, runs in enumerate(levels):
+                if len(runs) < MERGE_FAN_IN:
+                    break
+                merged = _spill(_merge(runs, key, cancellation), temp_dir)
+                levels[level] = list()
+                if level + 1 == len(levels):
+                    levels.append(list())
+                levels[level + 1].append(merged)
+
+        runs = [run for runs in reversed(levels) for run in runs]
+        levels = [runs]
+        while len(runs) > MERGE_FAN_IN:
+            runs[:MERGE_FAN_IN] = [_spill(_merge(runs[:MERGE_FAN_IN], key, cancellation), temp_dir)]
+    except BaseException:
+        for runs in levels:
+            for run in runs:
+                run.close()
+        raise
+
+    return _merge(runs, key, cancellation)
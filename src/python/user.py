@@ -1,30 +1,112 @@
-from typing import List, Dict, Any, Optional
-from .query_builder import DataQueryBuilder, CSVData
+from typing import List, Dict, Any, Optional, Iterable
+from .query_builder import DataQueryBuilder, CSVData, CSVRow
+from .indexes import IndexSet
+from .query_cache import QueryResultCache, copy_result, view_result
+from .cancellation import CancellationToken
 
 
 class User:
-    def __init__(self, username: str, data: CSVData, headers: List[str]):
+    def __init__(self, username: str, data: CSVData, headers: List[str],
+                 cache_size: int = 128, cache_max_rows: Optional[int] = None,
+                 prefix_cache_size: int = 32, prefix_cache_max_rows: Optional[int] = 1_000_000):
         self.username = username
-        self.data = data
+        self._data = data
+        self._data_version = 0
+        self._data_length = self._length(data)
         self.headers = headers
         self.saved_queries: Dict[str, List[tuple]] = dict()
+        self.indexes = IndexSet(data)
+        self.query_cache = QueryResultCache(cache_size, cache_max_rows)
+        self.prefix_cache = QueryResultCache(prefix_cache_size, prefix_cache_max_rows)
+
+    @property
+    def data(self) -> CSVData:
+        return self._data
+
+    @data.setter
+    def data(self, data: CSVData) -> None:
+        self._data = data
+        self._data_changed()
+
+    @property
+    def data_version(self) -> int:
+        self._sync_data_version()
+        return self._data_version
+
+    def append_data(self, rows: Iterable[CSVRow]) -> None:
+        if not isinstance(self._data, list):
+            self._data = list(self._data)
+        self._data.extend(rows)
+        self._data_changed()
+
+    def touch(self) -> None:
+        """Сообщает об изменении строк на месте (user.data[i] = row, правка полей строки):
+        увеличивает версию данных, перестраивает индексы и сбрасывает кэши запросов."""
+        self._data_changed()
+
+    def _data_changed(self) -> None:
+        self._data_version += 1
+        self._data_length = self._length(self._data)
+        self.indexes = self.indexes.rebuilt(self._data)
+        self.query_cache.clear()
+        self.prefix_cache.clear()
+
+    @staticmethod
+    def _length(data: Any) -> Optional[int]:
+        return len(data) if hasattr(data, '__len__') else None
+
+    def _sync_data_version(self) -> None:
+        if self._length(self._data) != self._data_length:
+            self._data_changed()
+
+    def _invalidate_query(self, query_name: str) -> None:
+        self.query_cache.invalidate(lambda key: key[0] == query_name)
+
+    def get_cache_stats(self) -> Dict[str, int]:
+        return self.query_cache.get_stats()
+
+    def get_prefix_cache_stats(self) -> Dict[str, int]:
+        return self.prefix_cache.get_stats()
+
+    def _builder(self) -> DataQueryBuilder:
+        return DataQueryBuilder(self.data, self.headers, self.indexes, self.prefix_cache)
+
+    def create_index(self, field: str, kind: str = 'hash') -> None:
+        if field not in self.headers:
+            raise ValueError(f"Поле {field} отсутствует")
+
+        self.indexes.create_index(field, kind)
 
     def create_query(self, query_name: str) -> DataQueryBuilder:
-        builder = DataQueryBuilder(self.data, self.headers)
+        self._sync_data_version()
+        builder = self._builder()
         setattr(builder, '_query_name', query_name)
         return builder
 
     def save_query(self, query_name: str, builder: DataQueryBuilder) -> None:
         operations = builder.get_operations()
+        self._invalidate_query(query_name)
         self.saved_queries[query_name] = operations
 
-    def execute_saved_query(self, query_name: str) -> Any:
+    def execute_saved_query(self, query_name: str, copy: bool = False,
+                            cancellation: Optional[CancellationToken] = None) -> Any:
         if query_name not in self.saved_queries:
             raise KeyError(f"Сохраненный запрос '{query_name}' не найден")
 
-        builder = DataQueryBuilder(self.data, self.headers)
-        builder.set_operations(self.saved_queries[query_name])
-        return builder.execute()
+        operations = self.saved_queries[query_name]
+        key = (query_name, self.data_version)
+        result = self.query_cache.get(key, operations)
+
+        if result is None:
+            builder = self._builder().with_cancellation(cancellation)
+            builder.set_operations(operations)
+            result = builder.execute()
+            self.query_cache.put(key, result, operations)
+
+        return copy_result(result) if copy else view_result(result)
+
+    def execute_saved_queries(self, query_names: Iterable[str], copy: bool = False) -> Dict[str, Any]:
+        return {query_name: self.execute_saved_query(query_name, copy) for query_name in query_names}
 
     def get_saved_query_names(self) -> List[str]:
         return list(self.saved_queries.keys())
@@ -32,6 +114,7 @@ class User:
     def delete_saved_query(self, query_name: str) -> bool:
         if query_name in self.saved_queries:
             del self.saved_queries[query_name]
+            self._invalidate_query(query_name)
             return True
         return False
 
@@ -44,4 +127,5 @@ class User:
         if new_name in self.saved_queries:
             raise ValueError(f"Запрос с именем '{new_name}' уже существует")
 
+        self._invalidate_query(old_name)
         self.saved_queries[new_name] = self.saved_queries.pop(old_name)
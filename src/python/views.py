@@ -0,0 +1,50 @@
+from collections.abc import Sequence
+from types import MappingProxyType
+from typing import Dict, List, Any, Optional, Union, Iterator
+
+RowView = MappingProxyType
+
+
+class DataView(Sequence):
+    __slots__ = ('_data', '_indices')
+
+    def __init__(self, data: Sequence, indices: Optional[range] = None):
+        if isinstance(data, DataView) and indices is None:
+            data, indices = data._data, data._indices
+
+        self._data = data
+        self._indices = indices
+
+    def _positions(self) -> range:
+        return self._indices if self._indices is not None else range(len(self._data))
+
+    def __len__(self) -> int:
+        return len(self._indices) if self._indices is not None else len(self._data)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[RowView, 'DataView']:
+        if isinstance(index, slice):
+            return DataView(self._data, self._positions()[index])
+
+        if self._indices is not None:
+            index = self._indices[index]
+        return MappingProxyType(self._data[index])
+
+    def __iter__(self) -> Iterator[RowView]:
+        if self._indices is None:
+            return map(MappingProxyType, self._data)
+        return map(MappingProxyType, map(self._data.__getitem__, self._indices))
+
+    def copy(self) -> List[Dict[str, Any]]:
+        if self._indices is None:
+            return list(self._data)
+        return [self._data[index] for index in self._indices]
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, (DataView, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(row == other_row for row, other_row in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"DataView({len(self)} строк)"